@@ -0,0 +1,85 @@
+"""Recall and latency of the IVF index against exact search, at the similarity engine's settings.
+
+    python -m benchmarks.ann_recall --movies 1000000
+    python -m benchmarks.ann_recall --movies 1000000 --source synthetic --clusters 50000
+
+By default the vectors are mock catalog movies run through the engine's own
+FeatureEncoder, so they have its dimensionality and feature mix. The
+synthetic source scatters unit vectors around random centres instead; keep
+--clusters well away from nlist or every centre gets a list to itself and
+recall looks perfect.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from mock_omdb_server import build_catalog
+from movie_ann import IVFIndex, recall_at_k
+from movie_similarity import FeatureEncoder, movies_frame
+
+
+def catalog_vectors(n, chunk_size=50000):
+    """Mock catalog movies encoded the way SimilarityEngine encodes them"""
+    features = movies_frame(build_catalog(n))
+    encoder = FeatureEncoder().fit(features)
+    return np.vstack([encoder.transform(features.iloc[start:start + chunk_size])
+                      for start in range(0, n, chunk_size)])
+
+
+def synthetic_vectors(n, dims, clusters, seed=0):
+    """Unit vectors scattered around random cluster centres, like genre/cast groupings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dims)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)]
+    vectors += 0.6 * rng.standard_normal((n, dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def run(n, source, clusters, projected_dims, nprobe, k, n_queries):
+    start = time.perf_counter()
+    if source == 'catalog':
+        vectors = catalog_vectors(n)
+    else:
+        vectors = synthetic_vectors(n, FeatureEncoder().dims, clusters)
+    dims = vectors.shape[1]
+    ids = [f"tt{i:07d}" for i in range(n)]
+    queries = vectors[np.random.default_rng(1).choice(n, n_queries, replace=False)]
+    print(f"{source} vectors {n} x {dims} in {time.perf_counter() - start:.1f}s")
+
+    # The same list count SimilarityEngine picks
+    nlist = min(4096, int(2 * math.sqrt(n)))
+    index = IVFIndex(dims, nlist=nlist, nprobe=nprobe, projected_dims=projected_dims)
+    start = time.perf_counter()
+    index.train(vectors)
+    index.add(ids, vectors)
+    print(f"built index (nlist={index.nlist}, nprobe={nprobe}) in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, k)
+    ann_ms = (time.perf_counter() - start) / n_queries * 1000
+
+    start = time.perf_counter()
+    for query in queries:
+        np.argpartition(-(vectors @ query), k)[:k]
+    exact_ms = (time.perf_counter() - start) / n_queries * 1000
+
+    print(f"ann query:   {ann_ms:.2f} ms")
+    print(f"exact query: {exact_ms:.2f} ms")
+    print(f"recall@{k}: {recall_at_k(index, vectors, ids, queries, k):.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--movies', type=int, default=200000)
+    parser.add_argument('--source', choices=('catalog', 'synthetic'), default='catalog')
+    parser.add_argument('--clusters', type=int, default=50000, help="centres for --source synthetic")
+    parser.add_argument('--projected-dims', type=int, default=None)
+    parser.add_argument('--nprobe', type=int, default=16)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    run(args.movies, args.source, args.clusters, args.projected_dims, args.nprobe, args.k, args.queries)
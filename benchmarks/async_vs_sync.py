@@ -0,0 +1,52 @@
+"""Throughput of the blocking client on a thread pool against the async client.
+
+    python -m benchmarks.async_vs_sync --requests 400 --concurrency 32 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_omdb_server import build_catalog, mock_server_process
+from movie_catalog import MovieCatalog
+from omdb_async import AsyncOMDbClient
+from omdb_core import OMDbClient
+
+
+def run_sync(base_url, ids, concurrency):
+    client = OMDbClient('bench', max_workers=concurrency, cache=False, base_url=base_url,
+                        pool_size=concurrency, catalog=MovieCatalog(), quota=False, rate_limiter=False)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(client.get_movie_details, ids))
+    return time.perf_counter() - start
+
+
+async def run_async(base_url, ids, concurrency):
+    client = AsyncOMDbClient('bench', max_concurrency=concurrency, cache=False, base_url=base_url,
+                             pool_size=concurrency, catalog=MovieCatalog(), quota=False, rate_limiter=False)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.get_movie_details(imdb_id) for imdb_id in ids))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed
+
+
+def run(n_requests, concurrency, latency):
+    catalog_size = max(n_requests, 1000)
+    ids = [movie['imdbID'] for movie in build_catalog(catalog_size)[:n_requests]]
+    with mock_server_process(latency=latency, catalog_size=catalog_size) as base_url:
+        sync_time = run_sync(base_url, ids, concurrency)
+        async_time = asyncio.run(run_async(base_url, ids, concurrency))
+
+    for name, elapsed in (('sync + threads', sync_time), ('async', async_time)):
+        print(f"{name:15s} {elapsed:.3f}s  {n_requests / elapsed:.0f} req/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.latency)
@@ -0,0 +1,40 @@
+"""Compare a fresh connection per request against the pooled transport.
+
+    python -m benchmarks.connection_reuse --requests 500
+"""
+import argparse
+import time
+
+import requests
+
+from mock_omdb_server import MockOMDbServer
+from omdb_core.transport import OMDbTransport
+
+
+def run(n_requests):
+    with MockOMDbServer() as mock:
+        ids = [movie['imdbID'] for movie in mock.catalog]
+
+        start = time.perf_counter()
+        for n in range(n_requests):
+            requests.get(mock.base_url, params={'i': ids[n % len(ids)]}, timeout=10).json()
+        bare = time.perf_counter() - start
+        bare_connections = mock.connection_count
+
+        transport = OMDbTransport(mock.base_url, cache=False, quota=False, rate_limiter=False)
+        start = time.perf_counter()
+        for n in range(n_requests):
+            transport.get_json({'i': ids[n % len(ids)]})
+        pooled = time.perf_counter() - start
+        pooled_connections = mock.connection_count - bare_connections
+        transport.close()
+
+    print(f"bare requests.get: {bare:.3f}s, {bare_connections} connections")
+    print(f"pooled transport:  {pooled:.3f}s, {pooled_connections} connections")
+    print(f"speedup: {bare / pooled:.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    run(parser.parse_args().requests)
@@ -0,0 +1,172 @@
+"""How many concurrent sessions one Streamlit process can serve, measured headless with AppTest.
+
+    python -m benchmarks.streamlit_load --users 1,8,32 --latency 0.05 --output load.json
+
+Each simulated user opens the app, searches, opens a movie's details page
+and asks for recommendations, against the mock OMDb server. All users'
+sessions are alive at once and advance in lockstep, one step at a time, so
+the upstream calls seen during a step divide cleanly among the reruns that
+caused them (background prefetch and refresh traffic lands in whichever
+step it happens during).
+
+AppTest swaps a process-global runtime in and out around every script run,
+so reruns themselves execute one after another. Rerun times are therefore
+pure per-rerun cost, and reruns/s is what one process sustains when it
+never waits on a rerun it doesn't own, the ceiling to size workers with.
+
+The app runs with its production defaults, including the shared rate
+limiter. Only the on-disk state (cache, quota ledger, posters, store, index)
+is pointed at a throwaway directory and the daily quota is lifted, so every
+run starts cold. Memory per session is the RSS growth while all users'
+sessions are alive, divided by the number of users.
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from mock_omdb_server import build_catalog, mock_server_process
+from omdb_metrics import default_metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PAGE = os.path.join(ROOT, 'streamlit_app.py')
+DETAILS_PAGE = 'pages/2_Movie_Details.py'
+STEPS = ('load', 'search', 'select', 'details_page', 'recommendations')
+
+
+def rss_mb():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # No procfs (macOS): the peak is the best we can do
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
+
+def upstream_calls():
+    return sum(value for name, _, value in default_metrics().counters()
+               if name == 'omdb_upstream_requests_total')
+
+
+class User:
+    """One browser session walking through search, details and recommendations"""
+
+    def __init__(self, search_term, favorite, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.search_term = search_term
+        self.favorite = favorite
+        self.app = AppTest.from_file(MAIN_PAGE, default_timeout=timeout)
+        self.errors = []
+
+    def step(self, name):
+        """Run one step and return its rerun wall time in seconds"""
+        app = self.app
+        start = time.perf_counter()
+        if name == 'load':
+            app.run()
+        elif name == 'search':
+            app.text_input(key='search_input_main').input(self.search_term)
+            app.button(key='search_btn_main').click().run()
+        elif name == 'select':
+            buttons = [button for button in app.button if button.key and button.key.startswith('view_details_')]
+            if buttons:
+                buttons[0].click().run()
+        elif name == 'details_page':
+            app.switch_page(DETAILS_PAGE).run()
+        elif name == 'recommendations':
+            app.selectbox(key='app_mode_select').select('Get Recommendations').run()
+            app.text_input(key='fav_movie_input_main').input(self.favorite)
+            app.button(key='rec_btn_main').click().run()
+        elapsed = time.perf_counter() - start
+        if app.exception:
+            self.errors.append((name, app.exception[0].value))
+        return elapsed
+
+
+def run_level(n_users, searches, favorites, timeout):
+    users = [User(searches[i % len(searches)], favorites[i % len(favorites)], timeout)
+             for i in range(n_users)]
+    rss_before = rss_mb()
+    steps = []
+    for name in STEPS:
+        calls_before = upstream_calls()
+        start = time.perf_counter()
+        times = np.array([user.step(name) for user in users]) * 1000
+        wall = time.perf_counter() - start
+        steps.append({
+            'step': name,
+            'wall_seconds': round(wall, 3),
+            'reruns_per_second': round(n_users / wall, 2),
+            'rerun_ms': {f'p{q}': round(float(np.percentile(times, q)), 1) for q in (50, 95, 99)},
+            'max_ms': round(float(times.max()), 1),
+            'upstream_per_rerun': round((upstream_calls() - calls_before) / n_users, 2),
+        })
+    result = {
+        'users': n_users,
+        'steps': steps,
+        'mb_per_session': round(max(0.0, rss_mb() - rss_before) / n_users, 2),
+        'rss_mb': round(rss_mb(), 1),
+        'errors': [f"{name}: {error}" for user in users for name, error in user.errors],
+    }
+    del users
+    return result
+
+
+def run(levels, latency, error_rate, catalog_size, distinct, timeout):
+    results = []
+    with mock_server_process(latency=latency, error_rate=error_rate, catalog_size=catalog_size) as base_url:
+        # The transport reads this when first imported, so nothing may import it before here
+        os.environ['OMDB_BASE_URL'] = base_url
+        from benchmarks.suite import workload
+
+        catalog = build_catalog(catalog_size)
+        searches = workload('search', catalog, max(levels), distinct)
+        favorites = workload('recommendations', catalog, max(levels), distinct, seed=1)
+
+        # Import the app's modules and build its shared client before anything is measured
+        User(searches[0], favorites[0], timeout).step('load')
+        for n_users in levels:
+            result = run_level(n_users, searches, favorites, timeout)
+            results.append(result)
+            print(f"{n_users} users: {result['mb_per_session']} MB/session, "
+                  f"{len(result['errors'])} errors, rss {result['rss_mb']} MB")
+            for step in result['steps']:
+                print(f"  {step['step']:16s} {step['reruns_per_second']:7.1f} reruns/s  "
+                      f"p50 {step['rerun_ms']['p50']:8.1f} ms  "
+                      f"p95 {step['rerun_ms']['p95']:8.1f} ms  upstream/rerun {step['upstream_per_rerun']}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', default='1,8,32', help="comma-separated counts of live sessions")
+    parser.add_argument('--latency', type=float, default=0.05, help="mock server delay per response, seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--catalog-size', type=int, default=5000)
+    parser.add_argument('--distinct', type=int, default=50, help="distinct searches and favorites users pick from")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds one rerun may take")
+    parser.add_argument('--output', help="write the results here as JSON")
+    options = parser.parse_args()
+
+    # Fresh on-disk state for every run; must be set before the app's modules are imported
+    state_dir = tempfile.mkdtemp(prefix='omdb-load-')
+    for variable, name in (('OMDB_CACHE_PATH', 'cache.sqlite3'), ('OMDB_QUOTA_PATH', 'quota.sqlite3'),
+                           ('OMDB_POSTER_DIR', 'posters'), ('OMDB_STORE_PATH', 'store'),
+                           ('OMDB_ANN_PATH', 'ann')):
+        os.environ[variable] = os.path.join(state_dir, name)
+    os.environ['OMDB_DAILY_LIMIT'] = str(10 ** 9)
+
+    levels = [int(n) for n in options.users.split(',')]
+    results = run(levels, options.latency, options.error_rate, options.catalog_size, options.distinct,
+                  options.timeout)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump({'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'args': vars(options),
+                       'results': results}, f, indent=2)
+        print(f"results written to {options.output}")
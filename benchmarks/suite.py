@@ -0,0 +1,202 @@
+"""Throughput, latency and memory of OMDbClient calls against the mock OMDb server.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --concurrency 1,16,256 --latency 0.05 --error-rate 0.01 \
+        --output after.json --compare before.json
+    python -m benchmarks.suite --metrics-overhead --cached --latency 0 --requests 20000 --concurrency 1,16
+
+Every (operation, concurrency) pair runs in a fresh process with a fresh
+client, so peak RSS and upstream call counts belong to that run alone. The
+workload is drawn from the synthetic catalog with a fixed seed, so two runs
+with the same arguments send the same calls. --compare reports throughput
+and p95 changes against an earlier results file and exits non-zero when any
+of them regressed by more than --tolerance. --metrics-overhead runs every
+pair with metrics recording off and then on, and reports the difference;
+cached with no latency is the worst case, since the calls themselves are
+cheapest there.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from mock_omdb_server import build_catalog, mock_server_process
+from movie_catalog import MovieCatalog
+from omdb_cache import ResponseCache, ResultMemo
+from omdb_core import OMDbClient
+from omdb_metrics import Metrics
+
+OPERATIONS = ('search', 'details', 'recommendations')
+CONCURRENCY = (1, 4, 16, 64, 256)
+
+
+def workload(operation, catalog, n_calls, distinct, seed=0):
+    """n_calls arguments for operation, drawn from `distinct` possible inputs"""
+    rng = random.Random(seed)
+    movies = rng.sample(catalog, min(distinct, len(catalog)))
+    if operation == 'details':
+        pool = [movie['imdbID'] for movie in movies]
+    elif operation == 'recommendations':
+        pool = [movie['Title'] for movie in movies]
+    else:
+        # One or two title words, the way people type searches
+        pool = [' '.join(movie['Title'].split()[:rng.randint(1, 2)]) for movie in movies]
+    return [rng.choice(pool) for _ in range(n_calls)]
+
+
+def run_one(base_url, operation, concurrency, args):
+    """Drive one operation at one concurrency level and summarise it (runs in a child process)"""
+    metrics = Metrics() if args.get('metrics', True) else False
+    client = OMDbClient('bench', max_workers=8, base_url=base_url, pool_size=concurrency,
+                        catalog=MovieCatalog(), quota=False, rate_limiter=False, on_error=lambda message: None,
+                        cache=ResponseCache(None) if args['cached'] else False,
+                        memo=ResultMemo() if args['cached'] else False, metrics=metrics)
+    method = {'search': client.search_movies, 'details': client.get_movie_details,
+              'recommendations': client.get_recommendations}[operation]
+    calls = workload(operation, build_catalog(args['catalog_size']), args['requests'], args['distinct'])
+
+    def timed(argument):
+        start = time.perf_counter()
+        result = method(argument)
+        return time.perf_counter() - start, bool(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        outcomes = list(executor.map(timed, calls))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in outcomes]) * 1000
+    # Only known when recording
+    upstream = (sum(value for name, _, value in metrics.counters() if name == 'omdb_upstream_requests_total')
+                if metrics else None)
+    return {
+        'operation': operation,
+        'concurrency': concurrency,
+        'metrics': bool(metrics),
+        'calls': len(calls),
+        'seconds': round(elapsed, 4),
+        'throughput': round(len(calls) / elapsed, 2),
+        'latency_ms': {f'p{q}': round(float(np.percentile(latencies, q)), 3) for q in (50, 90, 95, 99)},
+        'max_ms': round(float(latencies.max()), 3),
+        'empty_results': sum(1 for _, found in outcomes if not found),
+        'upstream_calls': upstream,
+        'upstream_per_call': round(upstream / len(calls), 3) if metrics else None,
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(operations, levels, args):
+    results = []
+    server = dict(latency=args['latency'], error_rate=args['error_rate'], catalog_size=args['catalog_size'])
+    variants = (False, True) if args['metrics_overhead'] else (True,)
+    with mock_server_process(**server) as base_url:
+        for operation in operations:
+            for concurrency in levels:
+                for metrics in variants:
+                    # spawn rather than fork, so each run's RSS starts from a clean interpreter
+                    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                        result = executor.submit(run_one, base_url, operation, concurrency,
+                                                 dict(args, metrics=metrics)).result()
+                    results.append(result)
+                    upstream = 'n/a' if result['upstream_calls'] is None else result['upstream_calls']
+                    print(f"{operation:16s} c={concurrency:<4d} {result['throughput']:9.1f} calls/s  "
+                          f"p50 {result['latency_ms']['p50']:8.1f} ms  p99 {result['latency_ms']['p99']:8.1f} ms  "
+                          f"upstream {upstream:>6}  rss {result['peak_rss_mb']:6.1f} MB"
+                          f"{'' if metrics else '  (metrics off)'}")
+    return {
+        'meta': {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': args,
+        },
+        'results': results,
+    }
+
+
+def metrics_overhead(results):
+    """Print how much throughput and time per call change with metrics recording turned on"""
+    off = {(r['operation'], r['concurrency']): r for r in results if not r.get('metrics', True)}
+    for result in results:
+        base = off.get((result['operation'], result['concurrency']))
+        if base is None or not result.get('metrics', True):
+            continue
+        throughput = result['throughput'] / base['throughput'] - 1
+        # Wall time per call, so sub-millisecond calls still show a difference
+        added_us = (result['seconds'] / result['calls'] - base['seconds'] / base['calls']) * 1e6
+        print(f"{result['operation']:16s} c={result['concurrency']:<4d} metrics on: "
+              f"throughput {throughput:+7.2%}  {added_us:+8.2f} us/call")
+
+
+def compare(report, baseline, tolerance):
+    """Print changes against baseline and return the number of regressions beyond tolerance"""
+    before = {(r['operation'], r['concurrency'], r.get('metrics', True)): r for r in baseline['results']}
+    regressions = 0
+    for result in report['results']:
+        old = before.get((result['operation'], result['concurrency'], result.get('metrics', True)))
+        if old is None:
+            continue
+        throughput = result['throughput'] / old['throughput'] - 1
+        p95 = result['latency_ms']['p95'] / max(old['latency_ms']['p95'], 1e-9) - 1
+        slower = throughput < -tolerance or p95 > tolerance
+        regressions += slower
+        print(f"{result['operation']:16s} c={result['concurrency']:<4d} throughput {throughput:+7.1%}  "
+              f"p95 {p95:+7.1%}  upstream {old['upstream_calls']} -> {result['upstream_calls']}"
+              f"{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', default=','.join(OPERATIONS))
+    parser.add_argument('--concurrency', default=','.join(map(str, CONCURRENCY)),
+                        help="comma-separated thread counts, 1 to 256")
+    parser.add_argument('--requests', type=int, default=400, help="calls per operation and level")
+    parser.add_argument('--distinct', type=int, default=200, help="distinct inputs the calls are drawn from")
+    parser.add_argument('--latency', type=float, default=0.02, help="mock server delay per response, seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of mock responses that are 503")
+    parser.add_argument('--catalog-size', type=int, default=5000)
+    parser.add_argument('--cached', action='store_true', help="give each client a fresh in-memory cache and memo")
+    parser.add_argument('--metrics-overhead', action='store_true',
+                        help="run each pair with metrics off and on, and report the difference")
+    parser.add_argument('--output', help="write the results here as JSON")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="allowed slowdown before flagging, 0.1 = 10%%")
+    options = parser.parse_args()
+
+    levels = [int(level) for level in options.concurrency.split(',')]
+    if not all(1 <= level <= 256 for level in levels):
+        parser.error("concurrency levels must be between 1 and 256")
+    settings = {key: getattr(options, key) for key in
+                ('requests', 'distinct', 'latency', 'error_rate', 'catalog_size', 'cached', 'metrics_overhead')}
+
+    report = run(options.operations.split(','), levels, settings)
+    if options.metrics_overhead:
+        metrics_overhead(report['results'])
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {options.output}")
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(report, json.load(f), options.tolerance)
+        sys.exit(1 if regressions else 0)
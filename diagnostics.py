@@ -0,0 +1,68 @@
+"""Diagnostics view for the Streamlit pages, shown instead of the app at ?diagnostics=1."""
+import streamlit as st
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _latency_rows(metrics, name):
+    rows = []
+    for histogram in metrics.histograms():
+        if histogram['name'] == name:
+            rows.append({
+                'endpoint': histogram['labels'].get('endpoint'),
+                'calls': histogram['count'],
+                'p50 ms': _ms(histogram['p50']),
+                'p95 ms': _ms(histogram['p95']),
+                'p99 ms': _ms(histogram['p99']),
+                'max ms': _ms(histogram['max']),
+            })
+    return rows
+
+
+def _totals(metrics, name, label):
+    totals = {}
+    for counter, labels, value in metrics.counters():
+        if counter == name:
+            totals[labels.get(label)] = totals.get(labels.get(label), 0) + value
+    return totals
+
+
+def show_diagnostics(client):
+    """Per-endpoint latency percentiles, upstream traffic and cache effectiveness for client"""
+    st.title("🩺 Diagnostics")
+    metrics = client.metrics
+    if metrics is None:
+        st.info("Metrics are turned off for this client.")
+        return
+
+    if st.button("Refresh", key="diagnostics_refresh"):
+        st.rerun()
+
+    st.subheader("Client calls")
+    st.caption("Wall time of each OMDbClient call, including cache and memo hits")
+    st.dataframe(_latency_rows(metrics, 'omdb_call_seconds'))
+
+    st.subheader("Upstream requests")
+    st.dataframe(_latency_rows(metrics, 'omdb_upstream_seconds'))
+
+    upstream = sum(_totals(metrics, 'omdb_upstream_requests_total', 'endpoint').values())
+    # Nested calls (recommendations run searches and detail lookups) count once, at the top
+    actions = sum(value for endpoint, value in _totals(metrics, 'omdb_calls_total', 'endpoint').items()
+                  if endpoint in ('search_pages', 'recommendations'))
+    lookups = _totals(metrics, 'omdb_cache_lookups_total', 'result')
+    hit_rate = lookups.get('hit', 0) / max(1, sum(lookups.values()))
+    bytes_in = sum(h['sum'] for h in metrics.histograms() if h['name'] == 'omdb_upstream_bytes')
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Upstream requests", upstream)
+    col2.metric("Upstream calls per action", round(upstream / actions, 2) if actions else "N/A")
+    col3.metric("Cache hit rate", f"{hit_rate:.0%}")
+    col4.metric("Payload received", f"{bytes_in / 1024:.0f} KB")
+
+    with st.expander("Cache, memo and key stats"):
+        st.json({**client.stats(), 'memo': client.memo.stats() if client.memo is not None else None})
+
+    st.download_button("Download metrics (JSON)", metrics.to_json(), file_name="omdb-metrics.json",
+                       mime="application/json", key="diagnostics_download")
@@ -0,0 +1,262 @@
+"""Warm the local catalog from the public IMDb dataset dumps.
+
+    python -m ingest_imdb --basics title.basics.tsv.gz --ratings title.ratings.tsv.gz \
+        --principals title.principals.tsv.gz --names name.basics.tsv.gz
+
+The dumps are read in chunks and joined on tconst, which works in constant
+memory because IMDb publishes every file sorted by it. Chunks are turned
+into OMDb-shaped payloads on a process pool and appended to the columnar
+store that default_catalog() loads. Progress is checkpointed after every
+chunk, so an interrupted run picks up where it stopped.
+
+The full dumps hold millions of titles; --min-votes (1000 by default) keeps
+the catalog to the few tens of thousands people actually look up. Pass
+--min-votes 0 to take everything.
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from movie_store import DEFAULT_STORE_PATH, ColumnarStore
+
+# IMDb title types and the OMDb type each one is served as
+TITLE_TYPES = {
+    'movie': 'movie',
+    'tvMovie': 'movie',
+    'tvSeries': 'series',
+    'tvMiniSeries': 'series',
+    'tvEpisode': 'episode',
+}
+
+STATE_FILE = 'ingest-state.json'
+NAMES_DB = 'names.sqlite3'
+MAX_ACTORS = 4
+
+
+def _open(path):
+    return gzip.open(path, 'rt', encoding='utf-8') if path.endswith('.gz') else open(path, encoding='utf-8')
+
+
+def _rows(path):
+    """Yield the data lines of a TSV dump, without the header or line endings"""
+    with _open(path) as f:
+        next(f, None)
+        for line in f:
+            yield line.rstrip('\n')
+
+
+def _title_number(line):
+    # tconst is the first column; compare numerically since the IDs aren't all the same width
+    return int(line[2:line.index('\t')])
+
+
+def _value(field):
+    return None if field == '\\N' else field
+
+
+class _SortedStream:
+    """Hands out the lines of a tconst-sorted dump in step with the basics chunks"""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._next = next(lines, None)
+
+    def take_through(self, last_title):
+        taken = []
+        while self._next is not None and _title_number(self._next) <= last_title:
+            taken.append(self._next)
+            self._next = next(self._lines, None)
+        return taken
+
+
+def _chunks(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_names_db(names_path, db_path):
+    """Load name.basics into SQLite once, so workers can look people up without holding them all"""
+    db = sqlite3.connect(db_path)
+    db.execute('CREATE TABLE IF NOT EXISTS names (nconst TEXT PRIMARY KEY, name TEXT)')
+    db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+    if db.execute("SELECT 1 FROM meta WHERE key = 'complete'").fetchone():
+        db.close()
+        return
+
+    for chunk in _chunks(_rows(names_path), 50000):
+        db.executemany('INSERT OR REPLACE INTO names VALUES (?, ?)',
+                       (line.split('\t', 2)[:2] for line in chunk))
+        db.commit()
+    db.execute("INSERT OR REPLACE INTO meta VALUES ('complete', '1')")
+    db.commit()
+    db.close()
+
+
+def _lookup_names(db_path, nconsts):
+    if not db_path or not nconsts:
+        return {}
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    names = {}
+    nconsts = list(nconsts)
+    try:
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(nconsts), 900):
+            batch = nconsts[start:start + 900]
+            placeholders = ','.join('?' * len(batch))
+            names.update(db.execute(f'SELECT nconst, name FROM names WHERE nconst IN ({placeholders})', batch))
+    finally:
+        db.close()
+    return names
+
+
+def build_payloads(basics, ratings, principals, names_db=None, types=('movie', 'series'), min_votes=0):
+    """Join one chunk of dump lines into OMDb-style details payloads"""
+    votes_by_title = {}
+    for line in ratings:
+        tconst, rating, votes = line.split('\t')
+        votes_by_title[tconst] = (rating, int(votes))
+
+    directors = defaultdict(list)
+    actors = defaultdict(list)
+    for line in principals:
+        tconst, ordering, nconst, category = line.split('\t', 4)[:4]
+        if category == 'director':
+            directors[tconst].append((int(ordering), nconst))
+        elif category in ('actor', 'actress', 'self'):
+            actors[tconst].append((int(ordering), nconst))
+
+    selected = []
+    for line in basics:
+        fields = line.split('\t')
+        tconst, title_type, title = fields[0], fields[1], fields[2]
+        omdb_type = TITLE_TYPES.get(title_type)
+        if omdb_type not in types or fields[4] == '1':  # isAdult
+            continue
+        rating, votes = votes_by_title.get(tconst, (None, 0))
+        if votes < min_votes:
+            continue
+        selected.append((tconst, omdb_type, title, fields, rating, votes))
+
+    people = {nconst for tconst, *_ in selected
+              for _, nconst in directors.get(tconst, []) + sorted(actors.get(tconst, []))[:MAX_ACTORS]}
+    names = _lookup_names(names_db, people)
+
+    def credits(entries, limit=None):
+        found = [names[nconst] for _, nconst in sorted(entries)[:limit] if nconst in names]
+        return ', '.join(found) if found else 'N/A'
+
+    payloads = []
+    for tconst, omdb_type, title, fields, rating, votes in selected:
+        start_year, end_year = _value(fields[5]), _value(fields[6])
+        year = start_year or 'N/A'
+        if omdb_type == 'series' and start_year:
+            year = f"{start_year}–{end_year or ''}"
+        runtime, genres = _value(fields[7]), _value(fields[8])
+        payloads.append({
+            'Title': title,
+            'Year': year,
+            'Runtime': f"{runtime} min" if runtime else 'N/A',
+            'Genre': genres.replace(',', ', ') if genres else 'N/A',
+            'Director': credits(directors.get(tconst, [])),
+            'Actors': credits(actors.get(tconst, []), MAX_ACTORS),
+            'Plot': 'N/A',
+            'Poster': 'N/A',
+            'imdbRating': rating or 'N/A',
+            'imdbVotes': f"{votes:,}" if votes else 'N/A',
+            'imdbID': tconst,
+            'Type': omdb_type,
+            'Response': 'True',
+        })
+    return payloads
+
+
+def ingest(basics_path, ratings_path, principals_path, names_path=None, store_path=DEFAULT_STORE_PATH,
+           chunk_size=50000, workers=None, types=('movie', 'series'), min_votes=1000, restart=False,
+           compact=False):
+    """Stream the dumps into the columnar store, returning how many titles were written"""
+    store = ColumnarStore(store_path)
+    state_path = os.path.join(store_path, STATE_FILE)
+    state = {'basics': os.path.abspath(basics_path), 'chunks': 0, 'titles': 0}
+    if not restart and os.path.exists(state_path):
+        with open(state_path) as f:
+            saved = json.load(f)
+        if saved.get('basics') == state['basics']:
+            state = saved
+
+    names_db = None
+    if names_path:
+        names_db = os.path.join(store_path, NAMES_DB)
+        build_names_db(names_path, names_db)
+
+    def checkpoint():
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
+
+    ratings = _SortedStream(_rows(ratings_path))
+    principals = _SortedStream(_rows(principals_path))
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def commit_oldest():
+            payloads = pending.popleft().result()
+            store.append(payloads, attach=False)
+            state['chunks'] += 1
+            state['titles'] += len(payloads)
+            checkpoint()
+            print(f"chunk {state['chunks']}: {state['titles']} titles so far")
+
+        for number, chunk in enumerate(_chunks(_rows(basics_path), chunk_size)):
+            last_title = _title_number(chunk[-1])
+            chunk_ratings = ratings.take_through(last_title)
+            chunk_principals = principals.take_through(last_title)
+            if number < state['chunks']:
+                continue  # written by an earlier run
+
+            pending.append(executor.submit(build_payloads, chunk, chunk_ratings, chunk_principals,
+                                           names_db, types, min_votes))
+            # A couple of chunks per worker in flight keeps memory flat
+            while len(pending) >= workers * 2:
+                commit_oldest()
+        while pending:
+            commit_oldest()
+
+    store.refresh()
+    if compact:
+        # Merging copies every row into memory once, so it's opt-in for full dumps
+        store.compact()
+    return state['titles']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load IMDb dataset dumps into the local movie catalog")
+    parser.add_argument('--basics', required=True, help="title.basics.tsv[.gz]")
+    parser.add_argument('--ratings', required=True, help="title.ratings.tsv[.gz]")
+    parser.add_argument('--principals', required=True, help="title.principals.tsv[.gz]")
+    parser.add_argument('--names', help="name.basics.tsv[.gz], to fill in directors and actors")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--types', default='movie,series', help="comma-separated OMDb types to keep")
+    parser.add_argument('--min-votes', type=int, default=1000,
+                        help="skip titles with fewer IMDb votes; 0 keeps everything")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and start over")
+    parser.add_argument('--compact', action='store_true', help="merge the store into one segment afterwards")
+    args = parser.parse_args()
+
+    count = ingest(args.basics, args.ratings, args.principals, args.names, args.store, args.chunk_size,
+                   args.workers, tuple(args.types.split(',')), args.min_votes, args.restart, args.compact)
+    print(f"Catalog store at {args.store} now holds {count} ingested titles")
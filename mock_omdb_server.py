@@ -0,0 +1,226 @@
+"""A local stand-in for the OMDb API, used by benchmarks and load tests.
+
+Run it directly to serve a synthetic catalog:
+
+    python mock_omdb_server.py --port 8765 --latency 0.05
+
+then point the app at it with OMDB_BASE_URL=http://127.0.0.1:8765/
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+GENRES = ['Action', 'Adventure', 'Comedy', 'Crime', 'Drama', 'Fantasy',
+          'Horror', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War']
+WORDS = ['Dark', 'Knight', 'Star', 'Night', 'Love', 'Return', 'Last', 'City',
+         'Dream', 'Shadow', 'Fire', 'Ghost', 'River', 'King', 'Storm', 'Secret']
+NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie']
+SURNAMES = ['Nolan', 'Lee', 'Park', 'Garcia', 'Smith', 'Khan', 'Rossi', 'Silva']
+
+PAGE_SIZE = 10
+
+
+def build_catalog(size=1000, seed=0):
+    """Generate a deterministic synthetic catalog of OMDb detail payloads"""
+    rng = random.Random(seed)
+    catalog = []
+    for n in range(size):
+        genres = rng.sample(GENRES, rng.randint(1, 3))
+        title = ' '.join(rng.sample(WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            # Some titles carry a genre word so genre searches find something
+            title = f"{title} {genres[0]}"
+        year = rng.randint(1950, 2024)
+        catalog.append({
+            'Title': title,
+            'Year': str(year),
+            'Rated': rng.choice(['G', 'PG', 'PG-13', 'R']),
+            'Runtime': f"{rng.randint(80, 180)} min",
+            'Genre': ', '.join(genres),
+            'Director': f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}",
+            'Actors': ', '.join(f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}" for _ in range(3)),
+            'Plot': ' '.join(rng.choice(WORDS).lower() for _ in range(rng.randint(10, 40))),
+            'Poster': 'N/A',
+            'imdbRating': f"{rng.uniform(3, 9.5):.1f}",
+            'imdbID': f"tt{n:07d}",
+            'Type': 'movie',
+            'Response': 'True',
+        })
+    return catalog
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when a pool opens many at once
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class MockOMDbServer:
+    """Serves a synthetic catalog over HTTP/1.1 with configurable latency and error rate"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0,
+                 catalog_size=1000, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.catalog = build_catalog(catalog_size, seed)
+        self.by_id = {movie['imdbID']: movie for movie in self.catalog}
+        self.by_title = {}
+        for movie in self.catalog:
+            self.by_title.setdefault(movie['Title'].lower(), movie)
+        self.request_count = 0
+        self.connection_count = 0
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, query):
+        """Build the (status, payload) pair for a parsed query string"""
+        with self._lock:
+            self.request_count += 1
+            failed = self._rng.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            return 503, {'Response': 'False', 'Error': 'Service unavailable'}
+
+        if 'i' in query:
+            movie = self.by_id.get(query['i'])
+            if movie is None:
+                return 200, {'Response': 'False', 'Error': 'Incorrect IMDb ID.'}
+            return 200, movie
+
+        if 't' in query:
+            movie = self.by_title.get(query['t'].strip().lower())
+            if movie is None:
+                return 200, {'Response': 'False', 'Error': 'Movie not found!'}
+            return 200, movie
+
+        if 's' in query:
+            terms = query['s'].lower().split()
+            matches = [
+                movie for movie in self.catalog
+                if all(term in movie['Title'].lower() for term in terms)
+                and (not query.get('y') or movie['Year'] == query['y'])
+            ]
+            if not matches:
+                return 200, {'Response': 'False', 'Error': 'Movie not found!'}
+            page = max(1, int(query.get('page') or 1))
+            hits = matches[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            return 200, {
+                'Search': [
+                    {key: movie[key] for key in ('Title', 'Year', 'imdbID', 'Type', 'Poster')}
+                    for movie in hits
+                ],
+                'totalResults': str(len(matches)),
+                'Response': 'True',
+            }
+
+        return 200, {'Response': 'False', 'Error': 'Incorrect parameters'}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connection_count += 1
+
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                status, payload = server.respond(query)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _serve(port, kwargs):
+    MockOMDbServer(port=port, **kwargs).serve_forever()
+
+
+@contextlib.contextmanager
+def mock_server_process(**kwargs):
+    """Run a MockOMDbServer in its own process, so its work doesn't compete with the
+    client under test for the GIL, and yield its base URL"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    process = multiprocessing.Process(target=_serve, args=(port, kwargs), daemon=True)
+    process.start()
+    try:
+        deadline = time.time() + 10
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}/"
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a fake OMDb API locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--catalog-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    mock = MockOMDbServer(args.host, args.port, args.latency, args.error_rate, args.catalog_size)
+    print(f"Mock OMDb serving {len(mock.catalog)} movies at {mock.base_url}")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,252 @@
+import json
+import math
+import os
+
+import numpy as np
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over unit vectors.
+
+    Vectors are optionally random-projected down to `projected_dims`, stored
+    as float16 and bucketed by their nearest k-means centroid. A query scores
+    only the `nprobe` closest buckets. With a `path`, vectors live in a
+    memory-mapped file that grows as movies are inserted. A loaded index maps
+    the saved vectors read-only, so processes can share one; what they insert
+    afterwards stays in their own memory.
+    """
+
+    def __init__(self, dims, nlist=256, nprobe=8, projected_dims=None, seed=0, path=None):
+        self.dims = dims
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.path = path
+        self.projected_dims = projected_dims if projected_dims and projected_dims < dims else dims
+
+        self.projection = None
+        if self.projected_dims < dims:
+            rng = np.random.default_rng(seed)
+            self.projection = (rng.standard_normal((dims, self.projected_dims)) /
+                               math.sqrt(self.projected_dims)).astype(np.float32)
+
+        self.centroids = None
+        self.ids = []
+        self._row_of = {}
+        self._count = 0
+        self._vectors = np.zeros((0, self.projected_dims), dtype=np.float16)
+        self._saved = None  # read-only vectors of a loaded index; _vectors holds rows after them
+        self._saved_count = 0
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._pending = [[] for _ in range(nlist)]
+        self._seed = seed
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return len(self._row_of)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def train(self, vectors, iterations=10, sample_size=100000):
+        """Fit the coarse quantizer with spherical k-means on a sample"""
+        vectors = self._reduce(vectors)
+        rng = np.random.default_rng(self._seed)
+        if len(vectors) > sample_size:
+            vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        nlist = min(self.nlist, len(vectors))
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = self._nearest(vectors, centroids)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            filled = counts > 0
+            sums[filled] = np.add.reduceat(vectors[order], np.cumsum(counts)[filled] - counts[filled])
+            empty = ~filled
+            # Re-seed empty clusters from random points
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        self.centroids = centroids.astype(np.float32)
+        self.nlist = nlist
+        self._lists = self._lists[:nlist]
+        self._pending = self._pending[:nlist]
+
+    def add(self, ids, vectors):
+        """Insert or replace vectors; replaced ids keep only their newest vector"""
+        if not self.trained:
+            raise ValueError("IVFIndex must be trained before adding vectors")
+
+        vectors = self._reduce(vectors)
+        assignments = self._nearest(vectors, self.centroids)
+        start = self._count
+        self._ensure_capacity(start + len(ids))
+        offset = start - self._saved_count
+        self._vectors[offset:offset + len(ids)] = vectors
+        self._assignments[start:start + len(ids)] = assignments
+
+        for offset, (imdb_id, bucket) in enumerate(zip(ids, assignments)):
+            row = start + offset
+            old_row = self._row_of.get(imdb_id)
+            if old_row is not None:
+                self._assignments[old_row] = -1
+            self._row_of[imdb_id] = row
+            self.ids.append(imdb_id)
+            self._pending[bucket].append(row)
+        self._count += len(ids)
+
+    def search(self, vector, k=10, nprobe=None):
+        """[(id, score)] for the approximate k nearest neighbours of one vector"""
+        return self.search_batch(np.asarray(vector)[None, :], k, nprobe)[0]
+
+    def search_batch(self, vectors, k=10, nprobe=None):
+        if not self.trained or not self._count:
+            return [[] for _ in range(len(vectors))]
+
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        queries = self._reduce(vectors)
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        self._merge_pending()
+
+        results = []
+        for query, buckets in zip(queries, probes):
+            rows = np.concatenate([self._lists[bucket] for bucket in buckets])
+            rows = rows[self._assignments[rows] >= 0]
+            scores = self._gather(rows).astype(np.float32) @ query
+            results.append([(self.ids[rows[i]], float(scores[i])) for i in _top_k(scores, k)])
+        return results
+
+    def save(self):
+        """Flush vectors and write the index metadata next to them"""
+        if not self.path:
+            raise ValueError("IVFIndex has no path to save to")
+        if self._saved is not None:
+            raise ValueError("A loaded IVFIndex is read-only; save a rebuilt one to a new path")
+
+        self._merge_pending()
+        self._ensure_capacity(max(self._count, 1))
+        self._vectors.flush()
+        meta = {
+            'dims': self.dims,
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'projected_dims': self.projected_dims,
+            'count': self._count,
+            'capacity': len(self._vectors),
+            'seed': self._seed,
+        }
+        np.save(os.path.join(self.path, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(self.path, 'assignments.npy'), self._assignments[:self._count])
+        if self.projection is not None:
+            np.save(os.path.join(self.path, 'projection.npy'), self.projection)
+        with open(os.path.join(self.path, 'ids.json'), 'w') as f:
+            json.dump(self.ids, f)
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index with its vectors memory-mapped read-only"""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        # No path: nothing this process inserts is written back to the shared files
+        index = cls(meta['dims'], meta['nlist'], meta['nprobe'], meta['projected_dims'], meta['seed'])
+        index.centroids = np.load(os.path.join(path, 'centroids.npy'))
+        if index.projection is not None:
+            index.projection = np.load(os.path.join(path, 'projection.npy'))
+        with open(os.path.join(path, 'ids.json')) as f:
+            index.ids = json.load(f)
+
+        index._count = index._saved_count = meta['count']
+        index._saved = np.memmap(os.path.join(path, 'vectors.f16'), dtype=np.float16, mode='r',
+                                 shape=(index._count, index.projected_dims))
+        index._assignments = np.load(os.path.join(path, 'assignments.npy'))
+
+        live = np.flatnonzero(index._assignments[:index._count] >= 0)
+        index._row_of = {index.ids[row]: int(row) for row in live}
+        order = live[np.argsort(index._assignments[live], kind='stable')]
+        bounds = np.searchsorted(index._assignments[order], np.arange(index.nlist + 1))
+        index._lists = [order[bounds[i]:bounds[i + 1]] for i in range(index.nlist)]
+        return index
+
+    def _reduce(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.projection is not None:
+            vectors = vectors @ self.projection
+        return _normalize(vectors)
+
+    def _gather(self, rows):
+        if self._saved is None:
+            return self._vectors[rows]
+        vectors = np.empty((len(rows), self.projected_dims), dtype=np.float16)
+        saved = rows < self._saved_count
+        vectors[saved] = self._saved[rows[saved]]
+        vectors[~saved] = self._vectors[rows[~saved] - self._saved_count]
+        return vectors
+
+    @staticmethod
+    def _nearest(vectors, centroids, chunk=8192):
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            assignments[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return assignments
+
+    def _merge_pending(self):
+        for bucket, rows in enumerate(self._pending):
+            if rows:
+                self._lists[bucket] = np.concatenate([self._lists[bucket], np.asarray(rows, dtype=np.int64)])
+                self._pending[bucket] = []
+
+    def _ensure_capacity(self, needed):
+        capacity = self._saved_count + len(self._vectors)
+        if needed <= capacity:
+            return
+
+        capacity = max(needed, 2 * capacity, 1024)
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[:self._count] = self._assignments[:self._count]
+        self._assignments = assignments
+
+        if self.path:
+            # Grow the backing file in place and remap it
+            filename = os.path.join(self.path, 'vectors.f16')
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            with open(filename, 'ab') as f:
+                f.truncate(capacity * self.projected_dims * 2)
+            self._vectors = np.memmap(filename, dtype=np.float16, mode='r+',
+                                      shape=(capacity, self.projected_dims))
+        else:
+            vectors = np.zeros((capacity - self._saved_count, self.projected_dims), dtype=np.float16)
+            vectors[:self._count - self._saved_count] = self._vectors[:self._count - self._saved_count]
+            self._vectors = vectors
+
+
+def recall_at_k(index, matrix, ids, queries, k=10):
+    """Fraction of the exact top-k neighbours the index also returns"""
+    exact_scores = _normalize(np.asarray(queries, dtype=np.float32)) @ matrix.T
+    found = 0
+    for scores, approximate in zip(exact_scores, index.search_batch(queries, k)):
+        exact = {ids[i] for i in _top_k(scores, k)}
+        found += len(exact & {imdb_id for imdb_id, _ in approximate})
+    return found / (k * len(queries))
@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+from collections import defaultdict
+
+from movie_store import DEFAULT_STORE_PATH, ColumnarStore
+from movie_titles import tokenize, trigrams
+from omdb_cache import default_cache
+
+SEARCH_FIELDS = ('Title', 'Year', 'imdbID', 'Type', 'Poster')
+
+
+class MovieCatalog:
+    """Local index of movie details for offline title search.
+
+    With a ColumnarStore as `store`, the store's payloads stay memory-mapped and
+    are decoded one at a time when asked for; its title index answers searches.
+    Only movies added at runtime are held here.
+    """
+
+    def __init__(self, min_similarity=0.3, store=None):
+        self.min_similarity = min_similarity
+        self.store = store
+        self.movies = {}
+        self.version = 0  # bumped on every change so derived indexes know to rebuild
+        self._changes = []  # imdbID written by each version, oldest first
+        self._tokens = defaultdict(set)
+        self._trigrams = defaultdict(set)
+        self._title_token_counts = {}
+        self._title_trigram_counts = {}
+        self._lock = threading.Lock()
+        self.saved_version = 0  # last version written to a ColumnarStore
+
+    def __len__(self):
+        if self.store is None:
+            return len(self.movies)
+        with self._lock:
+            local = list(self.movies)
+        return len(self.store) + len(self.store.missing(local))
+
+    def __contains__(self, imdb_id):
+        return imdb_id in self.movies or (self.store is not None and imdb_id in self.store)
+
+    def get(self, imdb_id):
+        movie = self.movies.get(imdb_id)
+        if movie is None and self.store is not None:
+            movie = self.store.get(imdb_id)
+        return movie
+
+    def add(self, movie):
+        """Index a movie details payload, replacing any earlier copy"""
+        imdb_id = movie.get('imdbID')
+        if not imdb_id or movie.get('Response') == 'False':
+            return
+
+        with self._lock:
+            current = self.movies.get(imdb_id)
+            if current is movie or current == movie:
+                return
+            if current is not None:
+                self._unindex(imdb_id)
+            self.movies[imdb_id] = movie
+            title = movie.get('Title', '')
+            tokens = tokenize(title)
+            for token in tokens:
+                self._tokens[token].add(imdb_id)
+            self._title_token_counts[imdb_id] = len(tokens)
+            grams = trigrams(title)
+            for gram in grams:
+                self._trigrams[gram].add(imdb_id)
+            self._title_trigram_counts[imdb_id] = len(grams)
+            self._changes.append(imdb_id)
+            self.version += 1
+
+    def changed_since(self, version):
+        """imdbIDs added or replaced after a given version"""
+        with self._lock:
+            return list(dict.fromkeys(self._changes[version:]))
+
+    def ids(self):
+        """imdbID of every movie, without decoding any payloads"""
+        with self._lock:
+            local = list(self.movies)
+        if self.store is None:
+            return local
+        return self.store.query(columns=('imdbID',))['imdbID'].to_pylist() + self.store.missing(local)
+
+    def snapshot(self):
+        """A point-in-time list of every movie payload, decoding the store's too"""
+        with self._lock:
+            movies = list(self.movies.values())
+        if self.store is not None:
+            local = {movie['imdbID'] for movie in movies}
+            movies.extend(movie for movie in self.store.iter_payloads() if movie['imdbID'] not in local)
+        return movies
+
+    def add_many(self, movies):
+        for movie in movies:
+            self.add(movie)
+
+    def import_jsonl(self, path):
+        """Bulk import a JSON-lines dump of movie details, returning how many were added"""
+        count = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.add(json.loads(line))
+                    count += 1
+        return count
+
+    def export_jsonl(self, path):
+        movies = self.snapshot()
+        with open(path, 'w', encoding='utf-8') as f:
+            for movie in movies:
+                f.write(json.dumps(movie) + '\n')
+
+    def search(self, title, year=None, movie_type=None, limit=10, fuzzy=True):
+        """Search titles, returning results shaped like OMDb's `Search` list"""
+        query_tokens = tokenize(title)
+        if not query_tokens:
+            return []
+
+        scored = self._scored(query_tokens, limit, year, movie_type)
+        # Fall back to trigram similarity for typos and partial words
+        if not scored and fuzzy:
+            scored = self._fuzzy_matches(title, limit, year, movie_type)
+
+        results = []
+        for score, imdb_id in sorted(scored, key=lambda item: (-item[0], item[1])):
+            movie = self.get(imdb_id)
+            if year and not str(movie.get('Year', '')).startswith(str(year)):
+                continue
+            if movie_type and movie.get('Type', 'movie') != movie_type:
+                continue
+            results.append({field: movie.get(field, 'N/A') for field in SEARCH_FIELDS})
+            if len(results) >= limit:
+                break
+
+        return results
+
+    def find_title(self, title):
+        """Details of the movie titled exactly `title`, ignoring case and punctuation, or None.
+        Unlike search, a longer title containing the same words (a sequel, say) doesn't count."""
+        wanted = tokenize(title)
+        if not wanted:
+            return None
+        # Titles with no extra words score exactly 2; only those few get decoded
+        for score, imdb_id in sorted(self._scored(wanted, exact=True), key=lambda item: item[1]):
+            if score == 2.0:
+                movie = self.get(imdb_id)
+                if movie is not None and tokenize(movie.get('Title', '')) == wanted:
+                    return movie
+        return None
+
+    def load_from_cache(self, cache=None):
+        """Index every details response already held in the on-disk response cache"""
+        cache = cache or default_cache()
+        count = 0
+        for movie in cache.iter_responses('details'):
+            self.add(movie)
+            count += 1
+        return count
+
+    def load_from_store(self, store, **filters):
+        """Copy the current movies of a ColumnarStore into memory, optionally narrowed with
+        store.query filters. To use a store without copying it, pass it as `store` instead."""
+        in_sync = self.saved_version == self.version
+        count = 0
+        for movie in store.iter_payloads(**filters):
+            self.add(movie)
+            count += 1
+        if in_sync:
+            # Everything we just read is already in the store
+            self.saved_version = self.version
+        return count
+
+    def save_to_store(self, store):
+        """Append movies added or changed since the last save as a new store segment"""
+        with self._lock:
+            version = self.version
+            movies = [self.movies[imdb_id] for imdb_id in dict.fromkeys(self._changes[self.saved_version:])]
+        count = store.append(movies)
+        self.saved_version = version
+        return count
+
+    def _scored(self, query_tokens, limit=None, year=None, movie_type=None, exact=False):
+        # (score, imdbID) for titles holding every query word, preferring titles with fewer extra words
+        with self._lock:
+            postings = [self._tokens.get(token, set()) for token in query_tokens]
+            matches = set.intersection(*postings) if postings else set()
+            counts = self._title_token_counts
+            scored = [(1.0 + len(query_tokens) / max(counts[imdb_id], 1), imdb_id) for imdb_id in matches]
+
+        if self.store is not None:
+            # Same scoring over the store's best titles
+            for imdb_id, words in self._store_best(self.store.match_titles, query_tokens,
+                                                   limit=limit, year=year, movie_type=movie_type, exact=exact):
+                scored.append((1.0 + len(query_tokens) / max(words, 1), imdb_id))
+        return scored
+
+    def _store_best(self, method, *args, limit=None, **filters):
+        # The store's ranked (imdbID, score) pairs, minus those whose runtime copy already won;
+        # asks again for more when runtime copies crowd the store's first `limit` out
+        wanted = limit
+        while True:
+            imdb_ids, scores = method(*args, limit=limit, **filters)
+            best = [(imdb_id, score) for imdb_id, score in zip(imdb_ids, scores) if imdb_id not in self.movies]
+            if limit is None or len(imdb_ids) < limit or len(best) >= wanted:
+                return best
+            limit *= 2
+
+    def _fuzzy_matches(self, title, limit=None, year=None, movie_type=None):
+        query_grams = trigrams(title)
+        with self._lock:
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for imdb_id in self._trigrams.get(gram, ()):
+                    shared[imdb_id] += 1
+
+            scored = []
+            for imdb_id, count in shared.items():
+                similarity = count / (len(query_grams) + self._title_trigram_counts[imdb_id] - count)
+                if similarity >= self.min_similarity:
+                    scored.append((similarity, imdb_id))
+
+        if self.store is not None:
+            for imdb_id, similarity in self._store_best(self.store.similar_titles, title, self.min_similarity,
+                                                        limit=limit, year=year, movie_type=movie_type):
+                scored.append((similarity, imdb_id))
+        return scored
+
+    def _unindex(self, imdb_id):
+        title = self.movies[imdb_id].get('Title', '')
+        for token in tokenize(title):
+            self._tokens[token].discard(imdb_id)
+        for gram in trigrams(title):
+            self._trigrams[gram].discard(imdb_id)
+        self._title_token_counts.pop(imdb_id, None)
+        self._title_trigram_counts.pop(imdb_id, None)
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def default_catalog():
+    """Process-wide catalog, backed by the columnar store (if there is one) and seeded
+    from the response cache on first use"""
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            # The store stays memory-mapped, so worker processes share its pages
+            store = ColumnarStore() if os.path.isdir(DEFAULT_STORE_PATH) else None
+            _default_catalog = MovieCatalog(store=store)
+            _default_catalog.load_from_cache()
+        return _default_catalog
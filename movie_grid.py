@@ -0,0 +1,131 @@
+"""Streamlit card grids shared by the pages.
+
+Living in an imported module means these are defined once per process
+rather than on every rerun, and the card text caches survive reruns.
+"""
+import functools
+import math
+from concurrent.futures import as_completed
+
+import streamlit as st
+
+from movie_posters import default_poster_cache
+
+DETAILS_PAGE = "pages/2_Movie_Details.py"
+
+
+def show_poster(movie, missing_text, pending):
+    """Show the cached thumbnail, or a placeholder that fill_posters swaps out once it downloads"""
+    url = movie.poster
+    if not url:
+        st.info(missing_text)
+        return
+    posters = default_poster_cache()
+    data = posters.get(url)
+    if data is not None:
+        st.image(data, use_column_width=True)
+        return
+    slot = st.empty()
+    slot.info("🖼️ Loading poster...")
+    pending.append((slot, posters.fetch_async(url), missing_text))
+
+
+def fill_posters(pending):
+    """Replace each placeholder with its poster as the parallel downloads finish"""
+    slots = {future: (slot, missing_text) for slot, future, missing_text in pending}
+    for future in as_completed(slots):
+        slot, missing_text = slots[future]
+        data = future.result()
+        if data is not None:
+            slot.image(data, use_column_width=True)
+        else:
+            slot.info(missing_text)
+
+
+# Card text is keyed on the fields it shows, so a refreshed record gets a new card
+
+@functools.lru_cache(maxsize=4096)
+def _search_card_text(year, movie_type):
+    return f"**Year:** {year or 'N/A'}\n\n**Type:** {(movie_type or 'N/A').title()}"
+
+
+@functools.lru_cache(maxsize=4096)
+def _recommendation_card_text(year, genres, director, rating, runtime):
+    return (
+        f"**📅 Year:** {year or 'N/A'}\n\n"
+        f"**🎭 Genre:** {', '.join(genres) or 'N/A'}\n\n"
+        f"**🎬 Director:** {director or 'N/A'}\n\n"
+        f"**⭐ IMDB Rating:** {rating if rating is not None else 'N/A'}/10\n\n"
+        f"**⏱️ Runtime:** {f'{runtime} min' if runtime else 'N/A'}"
+    )
+
+
+def _details_button(movie, key):
+    # Button to view details in new page
+    if st.button("View Full Details", key=key):
+        # Store the selected movie in session state
+        st.session_state.selected_movie_id = movie.imdb_id
+        st.session_state.selected_movie_title = movie.title
+        st.page_link(DETAILS_PAGE, label="Go to Movie Details", icon="🎬")
+
+
+def search_card(movie, key, pending):
+    """One search result: title, poster, year and type"""
+    st.markdown(f"### {movie.title}")
+    show_poster(movie, "🎭 No poster available", pending)
+    st.markdown(_search_card_text(movie.year, movie.type))
+    _details_button(movie, f"view_details_{key}")
+    st.markdown("---")
+
+
+def recommendation_card(movie, key, pending):
+    """One recommendation: poster beside the key facts, with the plot in an expander"""
+    st.markdown(f"### {movie.title}")
+    col_img, col_info = st.columns([1, 2])
+    with col_img:
+        show_poster(movie, "📸 No poster", pending)
+    with col_info:
+        st.markdown(_recommendation_card_text(movie.year, tuple(movie.genres), movie.director,
+                                              movie.rating, movie.runtime))
+    _details_button(movie, f"rec_view_{key}")
+
+    # Plot summary in expander
+    plot = movie.plot
+    if plot:
+        with st.expander("📖 Quick Plot Summary"):
+            st.write(plot)
+    st.markdown("---")
+
+
+def reset_page(grid_key):
+    """Send a grid back to its first page, e.g. after a new search"""
+    st.session_state[f"{grid_key}_page"] = 0
+
+
+def _turn_page(grid_key, step):
+    st.session_state[f"{grid_key}_page"] = st.session_state.get(f"{grid_key}_page", 0) + step
+
+
+@st.fragment
+def paginated_grid(movies, render_card, grid_key, columns=3, page_size=12):
+    """Render only the current page of cards. Paging reruns this fragment, not the whole script."""
+    pages = max(1, math.ceil(len(movies) / page_size))
+    page = min(max(st.session_state.get(f"{grid_key}_page", 0), 0), pages - 1)
+    start = page * page_size
+
+    cols = st.columns(columns)
+    pending = []
+    for offset, movie in enumerate(movies[start:start + page_size]):
+        with cols[offset % columns]:
+            with st.container():
+                render_card(movie, start + offset, pending)
+
+    if pages > 1:
+        previous, label, following = st.columns([1, 2, 1])
+        previous.button("◀ Previous", key=f"{grid_key}_previous", disabled=page == 0,
+                        on_click=_turn_page, args=(grid_key, -1))
+        label.caption(f"Page {page + 1} of {pages} · {len(movies)} movies")
+        following.button("Next ▶", key=f"{grid_key}_next", disabled=page >= pages - 1,
+                         on_click=_turn_page, args=(grid_key, 1))
+
+    fill_posters(pending)
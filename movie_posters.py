@@ -0,0 +1,175 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image, features
+from requests.adapters import HTTPAdapter
+
+from omdb_concurrency import SingleFlight
+
+DEFAULT_POSTER_DIR = os.getenv('OMDB_POSTER_DIR', '.omdb_posters')
+
+# Thumbnail bounding box; OMDb posters are roughly 2:3
+THUMBNAIL_SIZE = (300, 450)
+
+
+class PosterCache:
+    """Downloads each poster once and keeps a resized thumbnail on disk, evicting least recently used"""
+
+    def __init__(self, path=DEFAULT_POSTER_DIR, max_bytes=100 * 1024 * 1024, size=THUMBNAIL_SIZE,
+                 quality=80, max_workers=8, timeout=10):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = size
+        self.quality = quality
+        self.timeout = timeout
+        # WebP is a lot smaller, but not every Pillow build can write it
+        self.format = 'WEBP' if features.check('webp') else 'JPEG'
+        self.extension = '.webp' if self.format == 'WEBP' else '.jpg'
+
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='poster')
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        # name -> size in bytes, oldest access first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        os.makedirs(path, exist_ok=True)
+        files = []
+        for name in os.listdir(path):
+            if name.endswith(self.extension):
+                stat = os.stat(os.path.join(path, name))
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._bytes += size
+
+    def get(self, url):
+        """Return the cached thumbnail bytes for url, or None without touching the network"""
+        data = self._read(self._name(url))
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def fetch(self, url):
+        """Return the thumbnail for url, downloading and resizing it if needed; None if it can't be had"""
+        data = self.get(url)
+        if data is not None:
+            return data
+        return self._load(url)
+
+    def fetch_async(self, url):
+        """Start fetching a thumbnail in the background and return its Future"""
+        return self._executor.submit(self._load, url)
+
+    def clear(self):
+        """Drop every cached thumbnail"""
+        with self._lock:
+            for name in self._entries:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current disk usage"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _name(self, url):
+        return hashlib.sha256(url.encode()).hexdigest()[:32] + self.extension
+
+    def _read(self, name):
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = os.path.join(self.path, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            # Someone removed the file behind our back
+            with self._lock:
+                self._bytes -= self._entries.pop(name, 0)
+            return None
+
+    def _load(self, url):
+        # Grids often show the same poster twice, so concurrent downloads are shared
+        return self._flight.do(url, lambda: self._read(self._name(url)) or self._download(url))
+
+    def _download(self, url):
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content))
+            image.thumbnail(self.size)
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, self.format, quality=self.quality)
+        except (requests.exceptions.RequestException, OSError) as e:
+            # OSError covers payloads Pillow can't decode
+            with self._lock:
+                self.failures += 1
+            print(f"Error fetching poster: {e}")
+            return None
+
+        data = buffer.getvalue()
+        self._store(self._name(url), data)
+        return data
+
+    def _store(self, name, data):
+        # Write to a temp file first so readers never see half a thumbnail
+        path = os.path.join(self.path, name)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                oldest, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                try:
+                    os.remove(os.path.join(self.path, oldest))
+                except OSError:
+                    pass
+
+
+_default_posters = None
+_default_posters_lock = threading.Lock()
+
+
+def default_poster_cache():
+    """Process-wide poster cache shared by every page and session"""
+    global _default_posters
+    with _default_posters_lock:
+        if _default_posters is None:
+            _default_posters = PosterCache()
+        return _default_posters
@@ -0,0 +1,335 @@
+import math
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from movie_ann import IVFIndex
+from movie_catalog import tokenize
+
+# Hashed width and weight of each feature block. Hashing keeps column
+# positions stable, so a single new movie can be encoded without a refit.
+BLOCKS = {
+    'genres': (32, 1.0),
+    'directors': (64, 0.5),
+    'actors': (128, 0.6),
+    'plot': (256, 0.8),
+}
+NUMERIC_COLUMNS = ('year', 'runtime', 'rating')
+NUMERIC_WEIGHT = 0.4
+DEFAULT_ANN_PATH = os.getenv('OMDB_ANN_PATH', '.omdb_ann')
+
+
+def _split_names(value):
+    if not isinstance(value, str) or value == 'N/A':
+        return []
+    return [name.strip().lower() for name in value.split(',') if name.strip()]
+
+
+def _bucket(token, width):
+    return zlib.crc32(token.encode('utf-8')) % width
+
+
+def movies_frame(movies):
+    """Parse OMDb details payloads into a typed DataFrame of similarity features"""
+    frame = pd.DataFrame.from_records(
+        list(movies),
+        columns=['imdbID', 'Genre', 'Director', 'Actors', 'Plot', 'Year', 'Runtime', 'imdbRating']
+    )
+    features = pd.DataFrame({'imdbID': frame['imdbID']})
+    features['genres'] = frame['Genre'].map(_split_names)
+    features['directors'] = frame['Director'].map(_split_names)
+    features['actors'] = frame['Actors'].map(_split_names)
+    features['plot'] = frame['Plot'].map(lambda plot: tokenize(plot) if isinstance(plot, str) and plot != 'N/A' else [])
+    features['year'] = pd.to_numeric(frame['Year'].astype(str).str[:4], errors='coerce')
+    features['runtime'] = pd.to_numeric(frame['Runtime'].astype(str).str.extract(r'(\d+)')[0], errors='coerce')
+    features['rating'] = pd.to_numeric(frame['imdbRating'], errors='coerce')
+    return features
+
+
+class FeatureEncoder:
+    """Turns a features frame into L2-normalized float32 vectors"""
+
+    def __init__(self, blocks=None, numeric_weight=NUMERIC_WEIGHT):
+        self.blocks = dict(blocks or BLOCKS)
+        self.numeric_weight = numeric_weight
+        self.dims = sum(width for width, _ in self.blocks.values()) + len(NUMERIC_COLUMNS)
+        self.idf = np.ones(self.blocks['plot'][0], dtype=np.float32)
+        self.numeric_mean = np.zeros(len(NUMERIC_COLUMNS), dtype=np.float32)
+        self.numeric_std = np.ones(len(NUMERIC_COLUMNS), dtype=np.float32)
+
+    def fit(self, features):
+        """Learn plot IDF weights and numeric scaling from a corpus"""
+        plot_counts = self._hashed(features['plot'], self.blocks['plot'][0])
+        doc_freq = (plot_counts > 0).sum(axis=0)
+        n_docs = max(len(features), 1)
+        self.idf = (np.log((1 + n_docs) / (1 + doc_freq)) + 1).astype(np.float32)
+
+        numeric = features[list(NUMERIC_COLUMNS)].astype(float)
+        self.numeric_mean = numeric.mean().fillna(0).to_numpy(dtype=np.float32)
+        self.numeric_std = numeric.std().fillna(1).replace(0, 1).to_numpy(dtype=np.float32)
+        return self
+
+    def transform(self, features):
+        parts = []
+        for name, (width, weight) in self.blocks.items():
+            block = self._hashed(features[name], width)
+            if name == 'plot':
+                block *= self.idf
+            parts.append(self._normalize(block) * weight)
+
+        numeric = features[list(NUMERIC_COLUMNS)].astype(float).to_numpy(dtype=np.float32)
+        numeric = np.nan_to_num((numeric - self.numeric_mean) / self.numeric_std)
+        parts.append(self._normalize(numeric) * self.numeric_weight)
+
+        return self._normalize(np.hstack(parts))
+
+    def _hashed(self, column, width):
+        block = np.zeros((len(column), width), dtype=np.float32)
+        for row, tokens in enumerate(column):
+            for token in tokens:
+                block[row, _bucket(token, width)] += 1
+        return block
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, without a full sort"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class SimilarityEngine:
+    """Content-based nearest neighbours over the local movie catalog.
+
+    Past `ann_threshold` movies, vectors are kept only in an approximate
+    index. With an `ann_path`, each rebuild saves that index and the encoder
+    fit it was built with to a fresh directory there and then points
+    `CURRENT` at it, so other processes reopen a complete index instead of
+    re-encoding the whole catalog. Reopened indexes are read-only; movies
+    added since are encoded into memory only.
+    """
+
+    def __init__(self, catalog, encoder=None, refit_growth=1.2, ann_threshold=100000,
+                 ann_path=DEFAULT_ANN_PATH, chunk_size=50000):
+        self.catalog = catalog
+        self.encoder = encoder or FeatureEncoder()
+        self.refit_growth = refit_growth
+        # Past this many movies, queries go through an approximate index instead of brute force
+        self.ann_threshold = ann_threshold
+        self.ann_path = ann_path
+        self.chunk_size = chunk_size  # movies encoded at once while filling the index
+        self.ann = None
+        self.ids = []
+        self.matrix = np.zeros((0, self.encoder.dims), dtype=np.float32)
+        self._rows = {}
+        self._buffer = self.matrix
+        self._fitted_size = 0
+        self._built_version = None
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """Bring the feature matrix up to date with the catalog"""
+        with self._lock:
+            version = self.catalog.version
+            if self._built_version == version:
+                return
+
+            loaded = self._built_version is None and self._load_ann()
+            if loaded:
+                # Catch up with movies added since the index was saved
+                changed = [imdb_id for imdb_id in self.catalog.ids() if imdb_id not in self._rows]
+            elif self._built_version is not None:
+                changed = self.catalog.changed_since(self._built_version)
+            else:
+                changed = None
+
+            if changed is None or len(self.catalog) > self._fitted_size * self.refit_growth:
+                self._rebuild()
+            else:
+                self._update(changed)
+            self._built_version = version
+
+    def _rebuild(self):
+        # Refit IDF and numeric scaling on the whole catalog
+        features = movies_frame(self.catalog.snapshot())
+        self.encoder.fit(features)
+        self.ids = list(features['imdbID'])
+        self._rows = {imdb_id: row for row, imdb_id in enumerate(self.ids)}
+        self._fitted_size = len(self.ids)
+
+        if len(self.ids) < self.ann_threshold:
+            self.ann = None
+            self._buffer = self.encoder.transform(features)
+            self.matrix = self._buffer[:len(self.ids)]
+            return
+
+        # Vectors go straight into the index a chunk at a time; no full-precision copy is kept
+        self._buffer = self.matrix = np.zeros((0, self.encoder.dims), dtype=np.float32)
+        build_path = None
+        if self.ann_path:
+            # Never write where another process may have the current index mapped
+            os.makedirs(self.ann_path, exist_ok=True)
+            build_path = tempfile.mkdtemp(prefix='index-', dir=self.ann_path)
+        self.ann = IVFIndex(self.encoder.dims, nlist=min(4096, int(2 * math.sqrt(len(self.ids)))),
+                            nprobe=16, path=build_path)
+        sample = features.sample(min(len(features), 100000), random_state=0)
+        self.ann.train(self.encoder.transform(sample))
+        for start in range(0, len(features), self.chunk_size):
+            chunk = features.iloc[start:start + self.chunk_size]
+            self.ann.add(list(chunk['imdbID']), self.encoder.transform(chunk))
+        if build_path:
+            self._publish_ann(build_path)
+
+    def _update(self, imdb_ids):
+        # Encode only new or replaced movies with the existing fit
+        movies = [movie for movie in map(self.catalog.get, imdb_ids) if movie]
+        if not movies:
+            return
+        # Not vectorize(): that refreshes first, and we are the refresh
+        vectors = self.encoder.transform(movies_frame(movies))
+        for movie in movies:
+            if movie['imdbID'] not in self._rows:
+                self._rows[movie['imdbID']] = len(self.ids)
+                self.ids.append(movie['imdbID'])
+
+        if self.ann is not None:
+            self.ann.add([movie['imdbID'] for movie in movies], vectors)
+            return
+
+        if len(self.ids) > len(self._buffer):
+            grown = np.zeros((max(2 * len(self._buffer), len(self.ids), 64), self.encoder.dims), dtype=np.float32)
+            grown[:len(self.matrix)] = self.matrix
+            self._buffer = grown
+        for movie, vector in zip(movies, vectors):
+            self._buffer[self._rows[movie['imdbID']]] = vector
+        self.matrix = self._buffer[:len(self.ids)]
+
+    def _publish_ann(self, build_path):
+        self.ann.save()
+        np.savez(os.path.join(build_path, 'encoder.npz'), idf=self.encoder.idf,
+                 numeric_mean=self.encoder.numeric_mean, numeric_std=self.encoder.numeric_std,
+                 fitted_size=self._fitted_size)
+        previous = self._current_ann()
+        # Swap the pointer in one step, so readers see the old index or the new one, never half of either
+        pointer = os.path.join(self.ann_path, 'CURRENT')
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(os.path.basename(build_path))
+        os.replace(pointer + '.tmp', pointer)
+        if previous and previous != build_path:
+            # Readers that still have it mapped keep their view
+            shutil.rmtree(previous, ignore_errors=True)
+        # Carry on from the published copy read-only, like every other process
+        self.ann = IVFIndex.load(build_path)
+
+    def _current_ann(self):
+        try:
+            with open(os.path.join(self.ann_path, 'CURRENT')) as f:
+                return os.path.join(self.ann_path, f.read().strip())
+        except OSError:
+            return None
+
+    def _load_ann(self):
+        # Only a catalog big enough to be served from the index reopens a saved one
+        if not self.ann_path or len(self.catalog) < self.ann_threshold:
+            return False
+        path = self._current_ann()
+        if path is None:
+            return False
+        try:
+            ann = IVFIndex.load(path)
+            state = np.load(os.path.join(path, 'encoder.npz'))
+        except OSError:
+            # Replaced and removed by another process's rebuild while we read it
+            return False
+        if ann.dims != self.encoder.dims or len(state['idf']) != len(self.encoder.idf):
+            return False
+
+        self.encoder.idf = state['idf']
+        self.encoder.numeric_mean = state['numeric_mean']
+        self.encoder.numeric_std = state['numeric_std']
+        self._fitted_size = int(state['fitted_size'])
+        self.ann = ann
+        # A replaced movie keeps its id, so this is one entry per live movie
+        self.ids = list(dict.fromkeys(ann.ids))
+        self._rows = {imdb_id: row for row, imdb_id in enumerate(self.ids)}
+        self._buffer = self.matrix = np.zeros((0, self.encoder.dims), dtype=np.float32)
+        return True
+
+    def vectorize(self, movies):
+        """Encode details payloads with the current encoder"""
+        with self._lock:
+            self.refresh()
+            return self.encoder.transform(movies_frame(movies))
+
+    def similar(self, movie, k=10, exclude=()):
+        """imdbIDs of the k catalog movies most similar to a details payload"""
+        return self.similar_batch([movie], k, exclude)[0]
+
+    def similar_batch(self, movies, k=10, exclude=()):
+        """Rank the catalog against several movies at once with one matrix product"""
+        if not movies:
+            return []
+
+        # Each movie is left out of its own results
+        excludes = [set(exclude) | {movie.get('imdbID')} for movie in movies]
+        with self._lock:
+            self.refresh()
+            if not self.ids:
+                return [[] for _ in movies]
+            queries = self.vectorize(movies)
+            if self.ann is not None:
+                return [
+                    [imdb_id for imdb_id, _ in neighbours if imdb_id not in skip][:k]
+                    for neighbours, skip in zip(self.ann.search_batch(queries, k + len(exclude) + 1), excludes)
+                ]
+            return [self._ranked(scores, k, skip) for scores, skip in zip(queries @ self.matrix.T, excludes)]
+
+    def similar_to_vector(self, vector, k=10, exclude=()):
+        """imdbIDs of the k catalog movies closest to an arbitrary profile vector"""
+        with self._lock:
+            self.refresh()
+            if not self.ids:
+                return []
+            if self.ann is not None:
+                return [imdb_id for imdb_id, _ in self.ann.search(vector, k + len(exclude))
+                        if imdb_id not in exclude][:k]
+            return self._ranked(self.matrix @ vector, k, set(exclude))
+
+    def _ranked(self, scores, k, exclude):
+        # Ask for a few extra so excluded movies don't shorten the list
+        ranked = []
+        for index in top_k(scores, k + len(exclude)):
+            imdb_id = self.ids[index]
+            if imdb_id not in exclude:
+                ranked.append(imdb_id)
+                if len(ranked) >= k:
+                    break
+        return ranked
+
+
+_engines = weakref.WeakValueDictionary()  # id(catalog) -> engine; an engine keeps its catalog alive
+_engines_lock = threading.Lock()
+
+
+def shared_engine(catalog):
+    """The process's SimilarityEngine for catalog, so every client over one catalog shares one index"""
+    with _engines_lock:
+        engine = _engines.get(id(catalog))
+        if engine is None:
+            engine = SimilarityEngine(catalog)
+            _engines[id(catalog)] = engine
+        return engine
@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from movie_titles import TitleIndex
+
+DEFAULT_STORE_PATH = os.getenv('OMDB_STORE_PATH', '.omdb_store')
+
+# Filterable fields get typed columns; the full payload rides along for get()
+SCHEMA = pa.schema([
+    ('imdbID', pa.string()),
+    ('title', pa.string()),
+    ('year', pa.int16()),
+    ('type', pa.string()),
+    ('genres', pa.list_(pa.string())),
+    ('rating', pa.float32()),
+    ('votes', pa.int32()),
+    ('runtime', pa.int16()),
+    ('payload', pa.string()),
+])
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _number(value, cast):
+    # OMDb formats numbers as "2010", "2008–2013", "148 min", "8.8" or "1,234,567"
+    if value in (None, '', 'N/A'):
+        return None
+    match = _NUMBER.search(str(value).replace(',', ''))
+    return cast(float(match.group())) if match else None
+
+
+def to_row(movie):
+    """Typed column values for an OMDb details payload"""
+    genres = movie.get('Genre')
+    return {
+        'imdbID': movie['imdbID'],
+        'title': movie.get('Title', ''),
+        'year': _number(movie.get('Year'), int),
+        'type': movie.get('Type'),
+        'genres': [genre.strip() for genre in genres.split(',')] if genres and genres != 'N/A' else [],
+        'rating': _number(movie.get('imdbRating'), float),
+        'votes': _number(movie.get('imdbVotes'), int),
+        'runtime': _number(movie.get('Runtime'), int),
+        'payload': json.dumps(movie),
+    }
+
+
+class ColumnarStore:
+    """Append-only catalog snapshots as memory-mapped Arrow files.
+
+    Every append writes a new immutable segment, and a later copy of a movie
+    supersedes earlier ones. Segments are opened with mmap, so processes
+    reading the same directory share pages through the OS cache instead of
+    each holding their own copy.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segments = []  # (name, table), oldest first
+        self._table = pa.table({name: [] for name in SCHEMA.names}, schema=SCHEMA)
+        self._live = np.zeros(0, dtype=bool)  # False for rows a later segment replaced
+        # Small in-memory indexes over the mapped rows; only payloads stay on disk
+        self._rows = {}  # imdbID -> row of its current copy
+        self._titles = TitleIndex()
+        self.refresh()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, imdb_id):
+        return imdb_id in self._rows
+
+    def refresh(self):
+        """Pick up segments written since we last looked, e.g. by another process"""
+        with self._lock:
+            known = {name for name, _ in self._segments}
+            new = [name for name in sorted(os.listdir(self.path))
+                   if name.endswith('.arrow') and name not in known]
+            for name in new:
+                self._attach(name, update_live=False)
+            if new:
+                # One pass over everything beats checking each new segment against all the old rows
+                self._live = self._latest_rows(self._table)
+
+    def append(self, movies, attach=True):
+        """Write movie payloads as a new segment, returning how many were stored.
+        Bulk loaders can pass attach=False and call refresh() once at the end."""
+        rows = [to_row(movie) for movie in movies if movie.get('imdbID') and movie.get('Response') != 'False']
+        if not rows:
+            return 0
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+
+        with self._lock:
+            name = self._next_name()
+            self._write(name, table)
+            if attach:
+                self._attach(name)
+        return len(rows)
+
+    def get(self, imdb_id):
+        """The latest payload stored for imdb_id, or None"""
+        with self._lock:
+            table, row = self._table, self._rows.get(imdb_id)
+        if row is None:
+            return None
+        return json.loads(table['payload'][row].as_py())
+
+    def query(self, columns=('imdbID', 'title', 'year', 'rating'), year=None, genres=None,
+              min_rating=None, movie_type=None):
+        """Current rows matching every given filter, with only `columns` read.
+
+        year is a single year or an inclusive (first, last) range; genres
+        matches movies having any of the listed genres.
+        """
+        with self._lock:
+            table, mask = self._table, self._live.copy()
+
+        if year is not None:
+            first, last = year if isinstance(year, tuple) else (year, year)
+            years = table['year']
+            mask &= pc.fill_null(pc.and_(pc.greater_equal(years, first), pc.less_equal(years, last)),
+                                 False).to_numpy(zero_copy_only=False)
+        if min_rating is not None:
+            mask &= pc.fill_null(pc.greater_equal(table['rating'], min_rating),
+                                 False).to_numpy(zero_copy_only=False)
+        if movie_type is not None:
+            mask &= pc.fill_null(pc.equal(table['type'], movie_type), False).to_numpy(zero_copy_only=False)
+        if genres is not None:
+            wanted = pa.array([genres] if isinstance(genres, str) else list(genres), pa.string())
+            column = table['genres'].combine_chunks()
+            hits = pc.is_in(pc.list_flatten(column), value_set=wanted)
+            rows = pc.filter(pc.list_parent_indices(column), hits).to_numpy()
+            in_genre = np.zeros(len(mask), dtype=bool)
+            in_genre[rows] = True
+            mask &= in_genre
+
+        return table.select(list(columns)).filter(pa.array(mask))
+
+    def iter_payloads(self, batch_size=10000, **filters):
+        """Yield every current payload matching the query filters, decoding one batch at a time"""
+        table = self.query(columns=('payload',), **filters)
+        for batch in table.to_batches(max_chunksize=batch_size):
+            for payload in batch.column(0).to_pylist():
+                yield json.loads(payload)
+
+    def match_titles(self, tokens, limit=None, year=None, movie_type=None, exact=False):
+        """imdbIDs and title word counts of current rows whose title has every token as a whole word,
+        fewest words first. Tokens are lowercase [a-z0-9] runs, as movie_titles.tokenize produces.
+        year (a prefix, like the catalog's) and movie_type narrow the rows before limit applies;
+        exact keeps only titles with no words beyond tokens."""
+        with self._lock:
+            table, live = self._table, self._live
+            rows, words = self._titles.match(tokens)
+        if exact:
+            rows, words = rows[words == len(tokens)], words[words == len(tokens)]
+        return self._best(table, live, rows, words, 'ascending', limit, year, movie_type)
+
+    def similar_titles(self, title, min_similarity, limit=None, year=None, movie_type=None):
+        """imdbIDs and trigram similarity of current rows whose title is close to title, closest first"""
+        with self._lock:
+            table, live = self._table, self._live
+            rows, similarity = self._titles.similar(title, min_similarity)
+        return self._best(table, live, rows, similarity, 'descending', limit, year, movie_type)
+
+    def missing(self, imdb_ids):
+        """The given imdbIDs that have no current row"""
+        return [imdb_id for imdb_id in imdb_ids if imdb_id not in self._rows]
+
+    def compact(self):
+        """Rewrite all current rows into one segment and drop the old ones"""
+        with self._lock:
+            if len(self._segments) < 2 and self._live.all():
+                return
+            live = self._table.filter(pa.array(self._live))
+            old = [name for name, _ in self._segments]
+            name = self._next_name()
+            self._write(name, live)
+            self._segments = []
+            self._table = live.slice(0, 0)
+            self._live = np.zeros(0, dtype=bool)
+            self._rows = {}
+            self._titles = TitleIndex()
+            self._attach(name)
+        for old_name in old:
+            # Readers that still have the file mapped keep their view
+            os.remove(os.path.join(self.path, old_name))
+
+    def to_parquet(self, path, **kwargs):
+        """Export the current rows as a single Parquet file for other tools"""
+        pq.write_table(self.query(columns=SCHEMA.names), path, **kwargs)
+
+    def _next_name(self):
+        numbers = [int(name.split('-')[1].split('.')[0]) for name in os.listdir(self.path)
+                   if name.startswith('segment-') and name.endswith('.arrow')]
+        return f"segment-{max(numbers, default=0) + 1:06d}.arrow"
+
+    def _write(self, name, table):
+        # Write under a temporary name so readers never map half a segment
+        temp_path = os.path.join(self.path, f".{name}.{os.getpid()}.tmp")
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, os.path.join(self.path, name))
+
+    @staticmethod
+    def _best(table, live, rows, scores, order, limit, year, movie_type):
+        # Filter and rank matches here, so callers only ever see `limit` of them; imdbID breaks ties
+        keep = live[rows]
+        if year:
+            years = pc.cast(table['year'].take(rows), pa.string())
+            keep &= pc.fill_null(pc.starts_with(years, str(year)), False).to_numpy(zero_copy_only=False)
+        if movie_type:
+            types = pc.fill_null(table['type'].take(rows), 'movie')
+            keep &= pc.equal(types, movie_type).to_numpy(zero_copy_only=False)
+        rows = rows[keep]
+        ranked = pa.table({'score': scores[keep], 'imdbID': table['imdbID'].take(rows)})
+        ranked = ranked.sort_by([('score', order), ('imdbID', 'ascending')])
+        if limit is not None:
+            ranked = ranked.slice(0, limit)
+        return ranked['imdbID'].to_pylist(), ranked['score'].to_pylist()
+
+    def _attach(self, name, update_live=True):
+        segment = pa.ipc.open_file(pa.memory_map(os.path.join(self.path, name))).read_all()
+        if update_live and len(self._live) and segment.num_rows:
+            # Rows this segment replaces are no longer current
+            replaced = pc.is_in(self._table['imdbID'], value_set=segment['imdbID'].combine_chunks())
+            self._live &= ~replaced.to_numpy(zero_copy_only=False)
+        # Later copies overwrite earlier ones, here as in _latest_rows
+        first_row = self._table.num_rows
+        self._rows.update(zip(segment['imdbID'].to_pylist(), range(first_row, first_row + segment.num_rows)))
+        self._titles.extend(segment['title'])
+        self._segments.append((name, segment))
+        self._table = pa.concat_tables([self._table, segment])
+        if update_live:
+            self._live = np.concatenate([self._live, self._latest_rows(segment)])
+
+    @staticmethod
+    def _latest_rows(segment):
+        # The last copy of an imdbID wins
+        live = np.zeros(segment.num_rows, dtype=bool)
+        if segment.num_rows:
+            numbered = segment.select(['imdbID']).append_column('row', pa.array(np.arange(segment.num_rows)))
+            live[numbered.group_by('imdbID').aggregate([('row', 'max')])['row_max'].to_numpy()] = True
+        return live
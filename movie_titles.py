@@ -0,0 +1,117 @@
+import re
+from functools import reduce
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of a title"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def trigrams(text):
+    """Character trigrams of a title, padded so short words still produce some"""
+    padded = f"  {' '.join(tokenize(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Token and trigram postings over row numbers, for titles that are only ever appended.
+
+    Postings are sorted int32 arrays rather than sets, so a million titles
+    cost tens of megabytes. Callers filter out rows that were replaced.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._trigrams = {}
+        self._token_counts = np.zeros(0, dtype=np.int16)
+        self._trigram_counts = np.zeros(0, dtype=np.int16)
+
+    def __len__(self):
+        return len(self._token_counts)
+
+    def extend(self, titles):
+        """Index titles (a list or Arrow array) as the next rows, numbered on from len(self).
+
+        Same tokens and trigrams as tokenize() and trigrams(), but computed
+        with Arrow string kernels so opening a large store stays quick.
+        """
+        if not isinstance(titles, (pa.Array, pa.ChunkedArray)):
+            titles = pa.array(titles, pa.string())
+        elif isinstance(titles, pa.ChunkedArray):
+            titles = titles.combine_chunks()
+        count = len(titles)
+        if not count:
+            return
+        start = len(self)
+
+        words = pc.split_pattern_regex(pc.utf8_lower(pc.fill_null(titles, '')), r'[^a-z0-9]+')
+        flat = pc.list_flatten(words)
+        parents = pc.list_parent_indices(words)
+        nonempty = pc.greater(pc.binary_length(flat), 0)
+        tokens = flat.filter(nonempty)
+        token_rows = np.asarray(parents.filter(nonempty), dtype=np.int64)
+        token_counts = np.bincount(token_rows, minlength=count)
+
+        # Rejoin the tokens so trigrams see the same padded text as trigrams()
+        offsets = np.concatenate([[0], np.cumsum(token_counts)]).astype(np.int32)
+        joined = pc.binary_join(pa.ListArray.from_arrays(pa.array(offsets), tokens), ' ')
+        padded = pc.binary_join_element_wise('  ', joined, ' ', '')
+        lengths = np.asarray(pc.binary_length(padded))
+        # Longest first, so the titles long enough for position i are a prefix
+        order = np.argsort(-lengths, kind='stable')
+        padded = padded.take(pa.array(order))
+        sorted_lengths = lengths[order]
+        grams, gram_rows = [], []
+        for i in range(int(sorted_lengths[0]) - 2):
+            reach = int(np.searchsorted(-sorted_lengths, -(i + 3), side='right'))
+            grams.append(pc.utf8_slice_codeunits(padded.slice(0, reach), i, i + 3))
+            gram_rows.append(order[:reach])
+
+        self._merge(self._tokens, tokens, token_rows, count, start)
+        gram_counts = self._merge(self._trigrams, pa.chunked_array(grams).combine_chunks(),
+                                  np.concatenate(gram_rows), count, start)
+        self._token_counts = np.concatenate([self._token_counts, token_counts.astype(np.int16)])
+        self._trigram_counts = np.concatenate([self._trigram_counts, gram_counts.astype(np.int16)])
+
+    def match(self, tokens):
+        """Rows whose title has every token as a whole word, and each one's word count"""
+        postings = [self._tokens.get(token) for token in dict.fromkeys(tokens)]
+        if not postings or any(rows is None for rows in postings):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int16)
+        # Smallest list first keeps every intersection small
+        rows = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), sorted(postings, key=len))
+        return rows, self._token_counts[rows]
+
+    def similar(self, title, min_similarity):
+        """Rows whose title's trigram (Jaccard) similarity to title is at least min_similarity"""
+        grams = trigrams(title)
+        postings = [self._trigrams[gram] for gram in grams if gram in self._trigrams]
+        if not postings:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        shared = np.bincount(np.concatenate(postings), minlength=len(self))
+        rows = np.flatnonzero(shared)
+        shared = shared[rows]
+        similarity = shared / (len(grams) + self._trigram_counts[rows] - shared)
+        keep = similarity >= min_similarity
+        return rows[keep], similarity[keep]
+
+    @staticmethod
+    def _merge(postings, keys, rows, count, start):
+        """Append each distinct (key, row) pair to the key's postings; returns keys per row"""
+        encoded = pc.dictionary_encode(keys)
+        pairs = np.sort(np.asarray(encoded.indices, dtype=np.int64) * count + rows)
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+        codes, rows = np.divmod(pairs, count)
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        names = encoded.dictionary.to_pylist()
+        for code, new_rows in zip(codes[np.concatenate([[0], bounds])].tolist(),
+                                  np.split((rows + start).astype(np.int32), bounds)):
+            current = postings.get(names[code])
+            postings[names[code]] = new_rows if current is None else np.concatenate([current, new_rows])
+        return np.bincount(rows, minlength=count)
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from omdb_cache import cache_key, memo_key
+from omdb_core.client import ClientPolicy, _timed
+from omdb_core.transport import TransportPolicy
+from omdb_quota import INTERACTIVE, QuotaExceeded
+
+
+class AsyncOMDbTransport(TransportPolicy):
+    """Async counterpart of OMDbTransport: one pooled aiohttp session, a concurrency cap and
+    single-flight. Keys, quota, caching and retry backoff are decided by TransportPolicy."""
+
+    def __init__(self, base_url=None, timeout=10, connect_timeout=3.05, cache=None,
+                 pool_size=10, max_concurrency=32, max_retries=3, backoff=0.5,
+                 quota=None, rate_limiter=None, key_pool=None, metrics=None):
+        super().__init__(base_url, cache=cache, max_retries=max_retries, backoff=backoff, quota=quota,
+                         rate_limiter=rate_limiter, key_pool=key_pool, metrics=metrics)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=timeout)
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+
+        self.coalesced = 0
+        self._session = None
+        self._semaphore = None
+        self._in_flight = {}
+
+    async def get_json(self, params, priority=INTERACTIVE):
+        """Return the decoded OMDb response for params"""
+        # The cache and quota ledger are SQLite and may wait on a lock, so they run off the loop
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self._cached, params)
+            if cached is not None:
+                return cached
+
+        # Share a request that is already on its way
+        key = cache_key(params)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(self._fetch(params, priority))
+            flight = self._in_flight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # The request is shared, so one waiter giving up must not cancel it for the rest;
+        # once nobody is waiting any more, it is cancelled too
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            flight[1] -= 1
+            if not flight[1] and not task.done():
+                task.cancel()
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _flight_stats(self):
+        return {'coalesced': self.coalesced, 'in_flight': len(self._in_flight)}
+
+    async def _fetch(self, params, priority):
+        tried = []
+        while True:
+            send, stale = await asyncio.to_thread(self._next_attempt, params, priority, tried)
+            if send is None:
+                return stale
+
+            if self.rate_limiter is not None:
+                # Poll rather than block, so the event loop keeps running
+                wait = self.rate_limiter.try_acquire(priority)
+                while wait:
+                    await asyncio.sleep(wait)
+                    wait = self.rate_limiter.try_acquire(priority)
+
+            try:
+                data = await self._send({name: str(value) for name, value in send.items()})
+            except aiohttp.ClientResponseError as e:
+                if self._rejected(send, e.status, e.message, tried):
+                    continue
+                raise
+
+            if self.cache is None:
+                return data
+            return await asyncio.to_thread(self._keep, send, data)
+
+    async def _send(self, params):
+        if self._session is None:
+            # Created lazily so the session binds to the loop that uses it
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    async with self._session.get(self.base_url, params=params) as response:
+                        body = await response.read()
+                        if self.metrics is not None:
+                            self._record(params, response.status, time.perf_counter() - start, len(body))
+                        if response.status < 500 or attempt >= self.max_retries:
+                            response.raise_for_status()
+                            return json.loads(body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if self.metrics is not None:
+                    self._record_error(params)
+                if attempt >= self.max_retries:
+                    raise
+
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+
+class AsyncOMDbClient(ClientPolicy):
+    """Non-blocking OMDb client with the same policy as OMDbClient (see ClientPolicy).
+
+    Catalog lookups, similarity ranking and the SQLite cache and quota run
+    through asyncio.to_thread, so nothing slow runs on the event loop.
+    """
+
+    request_errors = (aiohttp.ClientError, asyncio.TimeoutError, QuotaExceeded)
+
+    def __init__(self, api_key=None, max_concurrency=32, timeout=10, cache=None,
+                 base_url=None, pool_size=10, catalog=None, quota=None, rate_limiter=None,
+                 transport=None, on_error=None, plot='full', memo=None, metrics=None):
+        super().__init__(api_key, catalog=catalog, on_error=on_error, plot=plot, memo=memo, metrics=metrics)
+        self.max_concurrency = max_concurrency
+        if transport is None:
+            transport = AsyncOMDbTransport(base_url, timeout=timeout, cache=cache, pool_size=pool_size,
+                                           max_concurrency=max_concurrency, quota=quota,
+                                           rate_limiter=rate_limiter, key_pool=self._key_pool(),
+                                           metrics=self._transport_metrics())
+        self.transport = transport
+        self.base_url = self.transport.base_url
+
+    @_timed('search')
+    async def search_movies(self, title, year=None, movie_type=None, backend="omdb"):
+        """Search for movies by title, answering from the local catalog first when backend is "local"."""
+        return await self._memoized(memo_key('search', title, year, movie_type or 'movie', backend),
+                                    lambda: self._search_movies(title, year, movie_type, backend))
+
+    async def _search_movies(self, title, year, movie_type, backend):
+        local_results = await asyncio.to_thread(self._local_search, title, year, movie_type, backend)
+        if local_results:
+            return local_results
+
+        if not self.has_api_key():
+            self._report("❌ Please enter a valid API key in the sidebar!")
+            return []
+
+        try:
+            data = await self.transport.get_json(self._search_params(title, year, movie_type))
+        except self.request_errors as e:
+            self._report(f"Error fetching data: {e}")
+            return []
+        return self._search_results(data)
+
+    @_timed('details')
+    async def get_movie_details(self, imdb_id):
+        """Get detailed information about a specific movie"""
+        if not self.has_api_key():
+            return None
+        return await self._get_details(self._details_params(imdb_id))
+
+    async def find_movie(self, title):
+        """Get details for a movie by title, checking the local catalog before OMDb"""
+        local_movie = await asyncio.to_thread(self.catalog.find_title, title)
+        if local_movie is not None:
+            return local_movie
+
+        if not self.has_api_key():
+            return None
+        return await self._get_details(self._title_params(title))
+
+    @_timed('recommendations')
+    async def get_recommendations(self, favorite_movie_title, max_results=10):
+        """Get movie recommendations based on a favorite movie"""
+        return await self._memoized(memo_key('recommendations', favorite_movie_title, max_results),
+                                    lambda: self._recommendations(favorite_movie_title, max_results))
+
+    async def _recommendations(self, favorite_movie_title, max_results):
+        if not self.has_api_key():
+            return []
+
+        favorite_movie = await self.find_movie(favorite_movie_title)
+
+        if not favorite_movie:
+            return []
+
+        # Ranking may refit the whole similarity index first
+        similar_movies = await asyncio.to_thread(self._similar_movies, favorite_movie, max_results)
+        if similar_movies is not None:
+            return similar_movies
+
+        # Too few cached movies yet, so fall back to searching by genre
+        genre = self._genre_of(favorite_movie)
+        if not genre:
+            return []
+
+        candidate_ids = self._candidate_ids(favorite_movie, await self.search_movies(genre))
+        return await self._details_in_order(candidate_ids, max_results)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    async def _get_details(self, params):
+        try:
+            data = await self.transport.get_json(params)
+        except self.request_errors as e:
+            self._report(f"Error fetching movie details: {e}")
+            return None
+        # Indexing the payload into the catalog takes its lock
+        return await asyncio.to_thread(self._details_result, data)
+
+    async def _memoized(self, key, compute):
+        if self.memo is None:
+            return await compute()
+        # A usable memo entry is returned as is; otherwise compute here, on the loop, and store it
+        value = self.memo.get(key)
+        if value is None:
+            value = await compute()
+            self.memo.put(key, value)
+        return value
+
+    async def _details_in_order(self, imdb_ids, limit):
+        # Like fetch_in_order: never more in flight than could still be used, committed in input order
+        imdb_ids = list(imdb_ids)
+        results = []
+        pending = {}
+        next_submit = 0
+        next_commit = 0
+        try:
+            while next_commit < len(imdb_ids) and len(results) < limit:
+                window = min(self.max_concurrency, limit - len(results))
+                while next_submit < len(imdb_ids) and len(pending) < window:
+                    pending[next_submit] = asyncio.ensure_future(self.get_movie_details(imdb_ids[next_submit]))
+                    next_submit += 1
+
+                movie = await pending.pop(next_commit)
+                next_commit += 1
+                if movie:
+                    results.append(movie)
+        finally:
+            for task in pending.values():
+                task.cancel()
+        return results
+
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from omdb_concurrency import SingleFlight
+
+# How long cached responses stay fresh, per endpoint (seconds)
+DEFAULT_TTLS = {
+    'search': 24 * 60 * 60,
+    'details': 7 * 24 * 60 * 60,
+}
+
+DEFAULT_CACHE_PATH = os.getenv('OMDB_CACHE_PATH', '.omdb_cache.sqlite3')
+
+
+def endpoint_for(params):
+    """Name the OMDb endpoint a set of request params targets"""
+    if 'i' in params or 't' in params:
+        return 'details'
+    return 'search'
+
+
+def cache_key(params):
+    """Normalize request params into a cache key, ignoring the API key"""
+    normalized = {
+        name: str(value).strip().lower()
+        for name, value in params.items()
+        if name != 'apikey' and value not in (None, '')
+    }
+    return json.dumps(normalized, sort_keys=True)
+
+
+def content_hash(data):
+    """Stable fingerprint of a response body, for telling whether a refetch changed anything"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """In-process LRU in front of a SQLite store for OMDb responses"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, memory_entries=1024, disk_entries=50000):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._access_counts = Counter()  # hits not yet written to disk
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, endpoint TEXT, body TEXT, '
+                'fetched_at REAL, accessed_at REAL)'
+            )
+            # Older cache files predate the refresh bookkeeping columns
+            columns = {row[1] for row in self._db.execute('PRAGMA table_info(responses)')}
+            if 'hits' not in columns:
+                self._db.execute('ALTER TABLE responses ADD COLUMN hits INTEGER DEFAULT 0')
+            if 'content_hash' not in columns:
+                self._db.execute('ALTER TABLE responses ADD COLUMN content_hash TEXT')
+            self._db.commit()
+            self._disk_count = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def get(self, params, allow_stale=False):
+        """Return the cached response for params, or None if missing or expired.
+        With allow_stale, expired responses are returned too."""
+        key = cache_key(params)
+        ttl = self.ttls.get(endpoint_for(params))
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                fetched_at, data = entry
+                if allow_stale or ttl is None or now - fetched_at < ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    if self._db is not None:
+                        self._access_counts[key] += 1
+                    return data
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT body, fetched_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and (allow_stale or ttl is None or now - row[1] < ttl):
+                    self._db.execute('UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?',
+                                     (now, key))
+                    self._db.commit()
+                    data = json.loads(row[0])
+                    self._remember(key, row[1], data)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return data
+
+            self.misses += 1
+            return None
+
+    def set(self, params, data):
+        """Store a response in both tiers"""
+        key = cache_key(params)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, data)
+
+            if self._db is not None:
+                existed = self._db.execute('SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone()
+                # Upsert so a refetch keeps a decayed hit count: entries stay
+                # refresh candidates only while people keep reading them
+                self._db.execute(
+                    'INSERT INTO responses (key, endpoint, body, fetched_at, accessed_at, hits, content_hash) '
+                    'VALUES (?, ?, ?, ?, ?, 0, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET body = excluded.body, fetched_at = excluded.fetched_at, '
+                    'accessed_at = excluded.accessed_at, content_hash = excluded.content_hash, '
+                    'hits = hits / 2',
+                    (key, endpoint_for(params), json.dumps(data), now, now, content_hash(data))
+                )
+                if not existed:
+                    self._disk_count += 1
+                if self._disk_count > self.disk_entries:
+                    self._evict_disk()
+                self._db.commit()
+
+    def iter_responses(self, endpoint):
+        """Yield every stored response for an endpoint, fresh or not"""
+        with self._lock:
+            if self._db is not None:
+                bodies = [row[0] for row in self._db.execute(
+                    'SELECT body FROM responses WHERE endpoint = ?', (endpoint,)
+                )]
+            else:
+                bodies = [json.dumps(data) for key, (_, data) in self._memory.items()
+                          if endpoint_for(json.loads(key)) == endpoint]
+        for body in bodies:
+            yield json.loads(body)
+
+    def revalidation_candidates(self, endpoint, limit, min_age=0, near_expiry=0):
+        """Stored entries worth refetching: ones expiring within `near_expiry`
+        seconds first, then ones read since they were fetched, most read first.
+        Unread entries that aren't about to expire are left alone, as is
+        anything younger than `min_age`. Returns (params, fetched_at, hits,
+        content_hash) tuples."""
+        ttl = self.ttls.get(endpoint)
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                return []
+            self._flush_access_counts()
+            expires_soon = now + near_expiry - ttl if ttl is not None else 0
+            rows = self._db.execute(
+                'SELECT key, fetched_at, hits, content_hash FROM responses '
+                'WHERE endpoint = ? AND fetched_at <= ? AND (fetched_at <= ? OR hits > 0) '
+                'ORDER BY fetched_at <= ? DESC, hits DESC, fetched_at LIMIT ?',
+                (endpoint, now - min_age, expires_soon, expires_soon, limit)
+            ).fetchall()
+        return [(json.loads(key), fetched_at, hits, digest) for key, fetched_at, hits, digest in rows]
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._memory.clear()
+            self._access_counts.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM responses')
+                self._db.commit()
+                self._disk_count = 0
+
+    def stats(self):
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'disk_entries': self._disk_count if self._db is not None else 0,
+            }
+
+    def _flush_access_counts(self):
+        # Memory-tier hits are batched rather than written on every read
+        if self._access_counts:
+            self._db.executemany('UPDATE responses SET hits = hits + ? WHERE key = ?',
+                                 [(count, key) for key, count in self._access_counts.items()])
+            self._db.commit()
+            self._access_counts.clear()
+
+    def _remember(self, key, fetched_at, data):
+        self._memory[key] = (fetched_at, data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        # Drop the least recently used rows until we are back under the limit
+        excess = self._disk_count - self.disk_entries
+        self._db.execute(
+            'DELETE FROM responses WHERE key IN '
+            '(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)',
+            (excess,)
+        )
+        self._disk_count -= excess
+
+
+def memo_key(namespace, *parts):
+    """Normalize a query into a ResultMemo key: strings are case- and whitespace-insensitive"""
+    return (namespace,) + tuple(' '.join(part.lower().split()) if isinstance(part, str) else part
+                                for part in parts)
+
+
+class ResultMemo:
+    """Bounded, process-wide memo of computed results with stale-while-revalidate.
+
+    Within `ttl` a stored result is returned as is. For `stale_ttl` seconds
+    after that it is still returned straight away while a background thread
+    recomputes it. Older entries are recomputed in the caller. Falsy results
+    aren't stored, so an empty answer caused by a failed request is retried.
+    """
+
+    def __init__(self, max_entries=512, ttl=10 * 60, stale_ttl=60 * 60, max_workers=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> (computed_at, value)
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._refreshing = set()
+
+    def get(self, key, compute=None, wait=True, refresh=None):
+        """Return the result for key, computing it with compute() when there is nothing usable.
+        With wait=False (or no compute) a miss returns None instead, for callers that
+        compute the result themselves and put() it; stale entries are still refreshed.
+        Those refreshes run refresh() if given, else compute(), on one of the memo's threads."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                computed_at, value = entry
+                age = now - computed_at
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age < self.ttl:
+                        self.hits += 1
+                    else:
+                        self.stale_hits += 1
+                        refresh = refresh or compute
+                        if refresh is not None and key not in self._refreshing:
+                            self._refreshing.add(key)
+                            self._executor.submit(self._refresh, key, refresh)
+                    return value
+            self.misses += 1
+
+        if compute is None or not wait:
+            return None
+        # Sessions asking the same question at once share one computation
+        return self._flights.do(key, lambda: self._compute(key, compute))
+
+    def put(self, key, value):
+        """Store a result computed elsewhere"""
+        if not value:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None, namespace=None):
+        """Drop one key, every key in a namespace, or everything when called with neither"""
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif namespace is not None:
+                for stored in [stored for stored in self._entries if stored[0] == namespace]:
+                    del self._entries[stored]
+            else:
+                self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+            }
+
+    def _compute(self, key, compute):
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _refresh(self, key, compute):
+        try:
+            self._flights.do(key, lambda: self._compute(key, compute))
+        except Exception as e:
+            # The stale value keeps being served until a refresh succeeds or it ages out
+            print(f"Error refreshing memoized result: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache shared by every client that doesn't bring its own"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
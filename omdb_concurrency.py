@@ -0,0 +1,227 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch_in_order(fetch, items, limit, max_workers=8):
+    """Run fetch over items on a bounded thread pool and keep the first
+    `limit` truthy results in input order.
+
+    At most `max_workers` calls are in flight at once. Once `limit` results
+    have been collected, fetches that have not started yet are cancelled.
+    """
+    items = list(items)
+    results = []
+
+    if limit <= 0 or not items:
+        return results
+
+    max_workers = max(1, max_workers)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    next_submit = 0
+    next_commit = 0
+
+    try:
+        while next_commit < len(items) and len(results) < limit:
+            # Keep the window full, but never ask for more than we could still use
+            window = min(max_workers, limit - len(results))
+            while next_submit < len(items) and len(pending) < window:
+                pending[next_submit] = executor.submit(fetch, items[next_submit])
+                next_submit += 1
+
+            # Results are committed strictly in input order
+            future = pending.pop(next_commit)
+            next_commit += 1
+            try:
+                value = future.result()
+            except Exception:
+                value = None
+
+            if value:
+                results.append(value)
+    finally:
+        for future in pending.values():
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
+def iter_in_order(fetch, items, max_workers=3):
+    """Yield fetch(item) for each item in input order while up to
+    `max_workers` later items are fetched ahead in the background.
+
+    Only the prefetch window is ever held in memory. Closing the generator
+    cancels fetches that have not started. Calls that raise yield None.
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    window = deque()
+
+    try:
+        for item in items:
+            window.append(executor.submit(fetch, item))
+            if len(window) >= max_workers:
+                break
+
+        while window:
+            future = window.popleft()
+            try:
+                value = future.result()
+            except Exception:
+                value = None
+
+            # Top the window back up before handing the result over
+            for item in items:
+                window.append(executor.submit(fetch, item))
+                break
+
+            yield value
+    finally:
+        for future in window:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def map_concurrently(fn, items, max_workers=8):
+    """Apply fn to every item on a bounded thread pool, returning results in
+    input order with None in place of calls that raised"""
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            return fn(item)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(call, items))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight call"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn for key, or wait for and share the result of a call already running"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {'leaders': self.leaders, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+
+class Prefetcher:
+    """Runs speculative fetches in batches on a small pool, where starting a
+    new batch cancels whatever the previous one had not started yet.
+
+    Each batch fetches at most `budget` distinct items. Calls that raise are
+    counted and otherwise ignored, since nobody is waiting on the result.
+    """
+
+    def __init__(self, fetch, budget=12, max_workers=2, executor=None):
+        self.fetch = fetch
+        self.budget = budget
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures = []
+        self._queued = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def start(self):
+        """Cancel the current batch and begin an empty one"""
+        with self._lock:
+            self._generation += 1
+            for future in self._futures:
+                if future.cancel():
+                    self.cancelled += 1
+            self._futures = []
+            self._queued = set()
+
+    def add(self, item):
+        """Queue item in the current batch; returns False once the budget is spent"""
+        with self._lock:
+            if item in self._queued:
+                return True
+            if len(self._queued) >= self.budget:
+                return False
+            self._queued.add(item)
+            self._futures.append(self._executor.submit(self._run, self._generation, item))
+            self.submitted += 1
+            return True
+
+    def schedule(self, items):
+        """Replace the current batch with items, up to the budget"""
+        self.start()
+        for item in items:
+            if not self.add(item):
+                break
+
+    def stats(self):
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'pending': sum(not future.done() for future in self._futures),
+            }
+
+    def _run(self, generation, item):
+        # The batch may have been replaced while this call sat in the queue
+        with self._lock:
+            if generation != self._generation:
+                self.cancelled += 1
+                return
+        try:
+            self.fetch(item)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+        else:
+            with self._lock:
+                self.completed += 1
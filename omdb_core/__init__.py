@@ -0,0 +1,7 @@
+"""UI-free OMDb client shared by the Streamlit pages and scripts."""
+from omdb_core.client import PLACEHOLDER_API_KEY, OMDbClient, default_client
+from omdb_core.movie import Movie
+from omdb_core.refresh import RefreshScheduler, default_refresher
+
+__all__ = ['Movie', 'OMDbClient', 'PLACEHOLDER_API_KEY', 'RefreshScheduler', 'default_client',
+           'default_refresher']
@@ -0,0 +1,474 @@
+import functools
+import inspect
+import math
+import os
+import threading
+import time
+
+import requests
+
+from movie_catalog import default_catalog
+from movie_similarity import shared_engine
+from omdb_cache import ResultMemo, memo_key
+from omdb_concurrency import fetch_in_order, iter_in_order, map_concurrently
+from omdb_core.transport import OMDbTransport
+from omdb_keys import KeyPool, parse_keys
+from omdb_metrics import default_metrics
+from omdb_quota import BACKGROUND
+
+# The value the Streamlit sidebar ships with before a real key is entered
+PLACEHOLDER_API_KEY = "your_actual_api_key_here"
+
+
+def _timed(endpoint):
+    """Record each call's latency and outcome under endpoint, when the client has metrics.
+    Works on plain and async methods alike."""
+    def decorate(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if self.metrics is None:
+                    return await method(self, *args, **kwargs)
+                start = time.perf_counter()
+                outcome = 'error'
+                try:
+                    result = await method(self, *args, **kwargs)
+                    outcome = 'ok' if result else 'empty'
+                    return result
+                finally:
+                    self._record_call(endpoint, time.perf_counter() - start, outcome)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.metrics is None:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = method(self, *args, **kwargs)
+                outcome = 'ok' if result else 'empty'
+                return result
+            finally:
+                self._record_call(endpoint, time.perf_counter() - start, outcome)
+        return wrapper
+    return decorate
+
+
+class ClientPolicy:
+    """What OMDbClient and AsyncOMDbClient do the same way: keys, request parameters,
+    reading responses, reporting problems, memo and metrics, and ranking recommendations.
+    Subclasses only send the requests and wait for them.
+
+    Problems are reported through `on_error`, which takes a message and
+    defaults to print, so the Streamlit pages can pass st.error instead.
+    It is only called from the thread that made the call, never from a pool worker.
+    Final search and recommendation results are kept in `memo` (a ResultMemo;
+    False turns it off), so repeated questions cost no upstream calls.
+    Call latency, upstream traffic and cache hit rate are recorded in
+    `metrics` (default_metrics() unless given; False turns it off).
+    """
+
+    # What a failed request raises, as reported to on_error
+    request_errors = (requests.exceptions.RequestException,)
+
+    def __init__(self, api_key=None, catalog=None, on_error=None, plot='full', memo=None, metrics=None):
+        # One key, or a pool of comma-separated keys that requests are spread across
+        if api_key is None:
+            api_key = os.getenv('OMDB_API_KEYS') or os.getenv('OMDB_API_KEY')
+        self.api_keys = parse_keys(api_key)
+        self.api_key = self.api_keys[0] if self.api_keys else api_key
+        self.plot = plot
+        self.on_error = on_error or print
+        # Set on pool threads whose messages are reported later by the thread that started them
+        self._pending_errors = threading.local()
+        self.metrics = (default_metrics() if metrics is None else metrics) or None
+        # Every details payload we see is indexed for offline search
+        self.catalog = catalog if catalog is not None else default_catalog()
+        self.recommender = shared_engine(self.catalog)
+        self.memo = (ResultMemo() if memo is None else memo) or None
+        self.transport = None
+
+    def has_api_key(self):
+        """Whether a real key (not the sidebar placeholder) is configured"""
+        return bool(self.api_key) and self.api_key != PLACEHOLDER_API_KEY
+
+    def stats(self):
+        """Cache hit/miss, coalesced request and per-key usage counters"""
+        return self.transport.stats()
+
+    def _key_pool(self):
+        return KeyPool(self.api_keys) if self.api_keys else None
+
+    def _transport_metrics(self):
+        return self.metrics if self.metrics is not None else False
+
+    def _search_params(self, title, year, movie_type, page=1):
+        params = {
+            'apikey': self.api_key,
+            's': title,
+            'type': movie_type or 'movie'
+        }
+
+        if year:
+            params['y'] = year
+        if page > 1:
+            params['page'] = page
+        return params
+
+    def _details_params(self, imdb_id):
+        # Shared by get_movie_details and prefetch_details so both hit the same cache entry
+        return {
+            'apikey': self.api_key,
+            'i': imdb_id,
+            'plot': self.plot
+        }
+
+    def _title_params(self, title):
+        return {
+            'apikey': self.api_key,
+            't': title,
+            'plot': self.plot
+        }
+
+    def _local_search(self, title, year, movie_type, backend):
+        # Results from the local catalog when asked for and it has any, else None
+        if backend == "local":
+            return self.catalog.search(title, year, movie_type or 'movie') or None
+        return None
+
+    def _search_results(self, data):
+        if data.get('Response') == 'True':
+            return data['Search']
+        self._report(f"API Error: {data.get('Error', 'Unknown error')}")
+        return []
+
+    def _details_result(self, data):
+        if data.get('Response') == 'True':
+            self.catalog.add(data)
+            return data
+        return None
+
+    def _similar_movies(self, favorite_movie, max_results):
+        """Catalog movies ranked by content similarity, or None while the catalog is too small
+        to fill the list"""
+        similar_ids = self.recommender.similar(favorite_movie, max_results)
+        if len(similar_ids) >= max_results:
+            return [self.catalog.get(imdb_id) for imdb_id in similar_ids]
+        return None
+
+    @staticmethod
+    def _genre_of(movie):
+        return movie.get('Genre', '').split(',')[0] if movie.get('Genre') else ''
+
+    @staticmethod
+    def _candidate_ids(favorite_movie, hits):
+        # Filter out the original movie
+        return [movie['imdbID'] for movie in hits if movie['imdbID'] != favorite_movie['imdbID']]
+
+    def _record_call(self, endpoint, elapsed, outcome):
+        self.metrics.observe('omdb_call_seconds', elapsed, endpoint=endpoint)
+        self.metrics.inc('omdb_calls_total', endpoint=endpoint, outcome=outcome)
+
+    def _report(self, message):
+        errors = getattr(self._pending_errors, 'errors', None)
+        if errors is not None:
+            errors.append(message)
+        else:
+            self.on_error(message)
+
+    def _in_background(self, compute):
+        # For the memo's stale refreshes: they run on its own threads, where on_error
+        # (st.error, say) can't reach any page, so their messages are only logged
+        def refresh():
+            errors = []
+            outer = getattr(self._pending_errors, 'errors', None)
+            self._pending_errors.errors = errors
+            try:
+                return compute()
+            finally:
+                self._pending_errors.errors = outer
+                for message in dict.fromkeys(errors):
+                    print(f"Background refresh: {message}")
+        return refresh
+
+
+class OMDbClient(ClientPolicy):
+    """OMDb search, details and recommendations with no UI attached.
+
+    Requests go through `transport` (an OMDbTransport unless one is passed in).
+    See ClientPolicy for on_error, memo and metrics.
+    """
+
+    memo_max_results = 100  # the most iter_search results held in order to memoize them
+
+    def __init__(self, api_key=None, max_workers=8, timeout=10, cache=None,
+                 base_url=None, pool_size=10, catalog=None, quota=None, rate_limiter=None,
+                 transport=None, on_error=None, plot='full', memo=None,
+                 metrics=None):
+        super().__init__(api_key, catalog=catalog, on_error=on_error, plot=plot, memo=memo, metrics=metrics)
+        self.max_workers = max_workers  # in-flight limit for detail fan-out
+        # Pooled session, timeouts, retries, quota and the shared response cache live in the transport
+        if transport is None:
+            transport = OMDbTransport(base_url, timeout=timeout, cache=cache, pool_size=pool_size,
+                                      quota=quota, rate_limiter=rate_limiter, key_pool=self._key_pool(),
+                                      metrics=self._transport_metrics())
+        self.transport = transport
+        self.base_url = self.transport.base_url
+
+    @_timed('search')
+    def search_movies(self, title, year=None, movie_type=None, backend="omdb"):
+        """Search for movies by title, answering from the local catalog first when backend is "local"."""
+        return self._memoized(memo_key('search', title, year, movie_type or 'movie', backend),
+                              lambda: self._search_movies(title, year, movie_type, backend))
+
+    def _search_movies(self, title, year, movie_type, backend):
+        local_results = self._local_search(title, year, movie_type, backend)
+        if local_results:
+            return local_results
+
+        if not self.has_api_key():
+            self._report("❌ Please enter a valid API key in the sidebar!")
+            return []
+
+        try:
+            return self._search_results(self.transport.get_json(self._search_params(title, year, movie_type)))
+        except self.request_errors as e:
+            self._report(f"Error fetching data: {e}")
+            return []
+
+    def iter_search(self, title, year=None, movie_type=None, max_pages=10, prefetch=3):
+        """Yield search results page by page, fetching later pages in the background"""
+        if self.metrics is None:
+            yield from self._memoized_iter_search(title, year, movie_type, max_pages, prefetch)
+            return
+
+        # Timed from the first request to the last result handed over
+        start = time.perf_counter()
+        count = 0
+        try:
+            for movie in self._memoized_iter_search(title, year, movie_type, max_pages, prefetch):
+                count += 1
+                yield movie
+        finally:
+            self._record_call('search_pages', time.perf_counter() - start, 'ok' if count else 'empty')
+
+    def _memoized_iter_search(self, title, year, movie_type, max_pages, prefetch):
+        # Memoizing means holding the whole list, up to 10 results a page; longer scans
+        # just stream, so they stay constant-memory
+        if self.memo is None or max_pages * 10 > self.memo_max_results:
+            yield from self._iter_search(title, year, movie_type, max_pages, prefetch)
+            return
+
+        key = memo_key('search_pages', title, year, movie_type or 'movie', max_pages)
+        refresh = lambda: list(self._iter_search(title, year, movie_type, max_pages, prefetch))
+        results = self.memo.get(key, wait=False, refresh=self._in_background(refresh))
+        if results is not None:
+            yield from results
+            return
+
+        # Stream as usual, keeping the full list only if the caller read to the end
+        results = []
+        for movie in self._iter_search(title, year, movie_type, max_pages, prefetch):
+            results.append(movie)
+            yield movie
+        self.memo.put(key, results)
+
+    def _iter_search(self, title, year, movie_type, max_pages, prefetch):
+        if not self.has_api_key():
+            self._report("❌ Please enter a valid API key in the sidebar!")
+            return
+
+        try:
+            first_page = self._search_page(title, year, movie_type, 1)
+        except self.request_errors as e:
+            self._report(f"Error fetching data: {e}")
+            return
+
+        if not first_page:
+            return
+
+        yield from first_page['Search']
+
+        total_pages = min(max_pages, math.ceil(int(first_page.get('totalResults', 0)) / 10))
+        pages = iter_in_order(
+            lambda page: self._search_page(title, year, movie_type, page),
+            range(2, total_pages + 1),
+            max_workers=prefetch
+        )
+        for data in pages:
+            if data:
+                yield from data['Search']
+
+    def _search_page(self, title, year, movie_type, page):
+        data = self.transport.get_json(self._search_params(title, year, movie_type, page))
+        return data if data.get('Response') == 'True' else None
+
+    @_timed('details')
+    def get_movie_details(self, imdb_id):
+        """Get detailed information about a specific movie"""
+        if not self.has_api_key():
+            return None
+
+        try:
+            return self._details_result(self.transport.get_json(self._details_params(imdb_id)))
+        except self.request_errors as e:
+            self._report(f"Error fetching movie details: {e}")
+            return None
+
+    def prefetch_details(self, imdb_id):
+        """Warm the cache with a movie's details at background priority, in case it is opened next"""
+        if not self.has_api_key():
+            return None
+
+        try:
+            data = self.transport.get_json(self._details_params(imdb_id), priority=BACKGROUND)
+        except self.request_errors:
+            # Speculative, so failures (including a spent quota) stay quiet
+            return None
+        return self._details_result(data)
+
+    def find_movie(self, title):
+        """Get details for a movie by title, checking the local catalog before OMDb"""
+        local_movie = self.catalog.find_title(title)
+        if local_movie is not None:
+            return local_movie
+
+        if not self.has_api_key():
+            return None
+
+        try:
+            return self._details_result(self.transport.get_json(self._title_params(title)))
+        except self.request_errors as e:
+            self._report(f"Error fetching movie details: {e}")
+            return None
+
+    @_timed('recommendations')
+    def get_recommendations(self, favorite_movie_title, max_results=10, concurrent=True):
+        """Get movie recommendations based on a favorite movie"""
+        return self._memoized(memo_key('recommendations', favorite_movie_title, max_results),
+                              lambda: self._recommendations(favorite_movie_title, max_results, concurrent))
+
+    def _recommendations(self, favorite_movie_title, max_results, concurrent):
+        if not self.has_api_key():
+            return []
+
+        # Look up the favorite movie (a single request at most)
+        favorite_movie = self.find_movie(favorite_movie_title)
+
+        if not favorite_movie:
+            return []
+
+        # Rank everything we have cached by content similarity
+        similar_movies = self._similar_movies(favorite_movie, max_results)
+        if similar_movies is not None:
+            return similar_movies
+
+        # Too few cached movies yet, so fall back to searching by genre
+        return self._genre_recommendations(favorite_movie, max_results, concurrent)
+
+    def get_recommendations_batch(self, seeds, max_results=10, combined=False):
+        """Get recommendations for several favorite movies at once.
+
+        Returns a dict of ranked lists keyed by seed title, or one list for
+        the whole set when combined is True.
+        """
+        if not self.has_api_key():
+            return [] if combined else {}
+
+        # Look up every distinct seed concurrently
+        titles = list(dict.fromkeys(seeds))
+        found = self._in_workers(map_concurrently, self.find_movie, titles, self.max_workers)
+        seed_movies = {title: movie for title, movie in zip(titles, found) if movie}
+
+        if not seed_movies:
+            return [] if combined else {title: [] for title in titles}
+
+        profiles = list(seed_movies.values())
+        seed_ids = {movie['imdbID'] for movie in profiles}
+
+        # Fill a cold catalog once for the whole batch
+        if len(self.catalog) - len(seed_ids) < max_results:
+            self._warm_catalog(profiles, max_results * len(profiles))
+
+        if combined:
+            # Rank against the average of the seed profiles
+            profile = self.recommender.vectorize(profiles).mean(axis=0)
+            similar_ids = self.recommender.similar_to_vector(profile, max_results, exclude=seed_ids)
+            return [self.catalog.get(imdb_id) for imdb_id in similar_ids]
+
+        ranked = dict(zip(seed_movies, self.recommender.similar_batch(profiles, max_results)))
+        return {
+            title: [self.catalog.get(imdb_id) for imdb_id in ranked.get(title, [])]
+            for title in titles
+        }
+
+    def _in_workers(self, fan_out, fn, *args, **kwargs):
+        # Callbacks like st.error only reach the page from the script's own thread,
+        # so messages from the pool are held and reported here once it finishes
+        errors = []
+
+        def call(*fn_args):
+            outer = getattr(self._pending_errors, 'errors', None)
+            self._pending_errors.errors = errors
+            try:
+                return fn(*fn_args)
+            finally:
+                self._pending_errors.errors = outer
+
+        try:
+            return fan_out(call, *args, **kwargs)
+        finally:
+            # The same failure from many workers is shown once
+            for message in dict.fromkeys(errors):
+                self._report(message)
+
+    def _memoized(self, key, compute):
+        if self.memo is None:
+            return compute()
+        return self.memo.get(key, compute, refresh=self._in_background(compute))
+
+    def _warm_catalog(self, movies, budget):
+        # One genre search per distinct genre and one detail fetch per distinct candidate
+        genres = list(dict.fromkeys(
+            movie['Genre'].split(',')[0].strip() for movie in movies
+            if movie.get('Genre') and movie['Genre'] != 'N/A'
+        ))
+        searches = self._in_workers(map_concurrently, self.search_movies, genres, self.max_workers)
+        candidate_ids = list(dict.fromkeys(
+            hit['imdbID'] for hits in searches if hits for hit in hits
+            if hit['imdbID'] not in self.catalog
+        ))
+        self._in_workers(fetch_in_order, self.get_movie_details, candidate_ids, budget,
+                         max_workers=self.max_workers)
+
+    def _genre_recommendations(self, favorite_movie, max_results, concurrent):
+        genre = self._genre_of(favorite_movie)
+
+        if genre:
+            # Search by genre
+            candidate_ids = self._candidate_ids(favorite_movie, self.search_movies(genre))
+
+            # Fetch details for the candidates in parallel, keeping search order
+            return self._in_workers(
+                fetch_in_order,
+                self.get_movie_details,
+                candidate_ids,
+                max_results,
+                max_workers=self.max_workers if concurrent else 1
+            )
+
+        return []
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def default_client(api_key, **kwargs):
+    """Process-wide client for api_key, so every page shares one set of pools, caches and indexes.
+    kwargs only apply when the client is first created."""
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = OMDbClient(api_key, **kwargs)
+        return _clients[api_key]
@@ -0,0 +1,101 @@
+import re
+import sys
+import threading
+
+from movie_catalog import default_catalog
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+# Genre names are stored once per process; movies keep small integer IDs
+_genre_names = []
+_genre_ids = {}
+_genre_lock = threading.Lock()
+
+
+def genre_id(name):
+    """Intern a genre name and return its ID"""
+    name = name.strip()
+    with _genre_lock:
+        if name not in _genre_ids:
+            _genre_ids[name] = len(_genre_names)
+            _genre_names.append(name)
+        return _genre_ids[name]
+
+
+def genre_name(genre_id):
+    return _genre_names[genre_id]
+
+
+def _missing(value):
+    return value is None or value in ('', 'N/A')
+
+
+def _number(value, cast):
+    # OMDb formats numbers as "2010", "2008–2013", "148 min" or "8.8"
+    if _missing(value):
+        return None
+    match = _NUMBER.search(str(value))
+    return cast(float(match.group())) if match else None
+
+
+class Movie:
+    """Compact record for a movie, parsed once from an OMDb payload.
+
+    Numbers are native types and missing values are None rather than 'N/A'.
+    The plot is not stored; it is looked up in the catalog the first time
+    it is read, so sessions don't each hold a copy.
+    """
+
+    __slots__ = ('imdb_id', 'title', 'year', 'type', 'poster', 'runtime', 'rating',
+                 'genre_ids', 'director', '_catalog')
+
+    def __init__(self, imdb_id, title, year=None, type=None, poster=None, runtime=None,
+                 rating=None, genre_ids=(), director=None, catalog=None):
+        self.imdb_id = imdb_id
+        self.title = title
+        self.year = year
+        self.type = type
+        self.poster = poster
+        self.runtime = runtime
+        self.rating = rating
+        self.genre_ids = genre_ids
+        self.director = director
+        self._catalog = catalog
+
+    @classmethod
+    def from_omdb(cls, data, catalog=None):
+        """Build a Movie from a search hit or a details payload"""
+        genres = data.get('Genre')
+        return cls(
+            imdb_id=data['imdbID'],
+            title=data.get('Title', ''),
+            year=_number(data.get('Year'), int),
+            type=sys.intern(data['Type']) if not _missing(data.get('Type')) else None,
+            poster=None if _missing(data.get('Poster')) else data['Poster'],
+            runtime=_number(data.get('Runtime'), int),
+            rating=_number(data.get('imdbRating'), float),
+            genre_ids=tuple(genre_id(name) for name in genres.split(',')) if not _missing(genres) else (),
+            director=None if _missing(data.get('Director')) else data['Director'],
+            catalog=catalog,
+        )
+
+    @property
+    def genres(self):
+        return [genre_name(genre_id) for genre_id in self.genre_ids]
+
+    @property
+    def plot(self):
+        """Full plot from the catalog, or None if the details were never fetched"""
+        details = (self._catalog if self._catalog is not None else default_catalog()).get(self.imdb_id)
+        if details is None or _missing(details.get('Plot')):
+            return None
+        return details['Plot']
+
+    def __eq__(self, other):
+        return isinstance(other, Movie) and other.imdb_id == self.imdb_id
+
+    def __hash__(self):
+        return hash(self.imdb_id)
+
+    def __repr__(self):
+        return f"Movie({self.imdb_id!r}, {self.title!r}, {self.year!r})"
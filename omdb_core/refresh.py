@@ -0,0 +1,128 @@
+import itertools
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from omdb_cache import content_hash
+from omdb_concurrency import map_concurrently
+from omdb_quota import BACKGROUND
+
+
+class RefreshScheduler:
+    """Background job that keeps cached movie details fresh without refetching everything.
+
+    Every `interval` seconds it revalidates up to `batch_size` cached details:
+    entries about to expire first, then ones people have read since the last
+    fetch, never anything fetched less than `min_age` seconds ago. Requests
+    go out at BACKGROUND priority, so they queue behind users, and the job
+    spends at most `daily_budget` requests a day, so prefetch keeps most of
+    the background share. The catalog, and through it the similarity index,
+    is only touched when a payload's content hash changed.
+    """
+
+    def __init__(self, client, batch_size=20, interval=15 * 60, min_age=6 * 60 * 60,
+                 near_expiry=24 * 60 * 60, max_workers=2, daily_budget=100):
+        self.client = client
+        self.batch_size = batch_size
+        self.interval = interval
+        self.min_age = min_age
+        self.near_expiry = near_expiry
+        self.max_workers = max_workers
+        self.daily_budget = daily_budget
+
+        self.totals = Counter()
+        self.last_run = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._budget_day = None
+        self._budget_used = 0
+
+    def start(self):
+        """Run batches on a daemon thread until stop() is called"""
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name='omdb-refresh', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def run_once(self):
+        """Revalidate one batch now and return how many entries changed, were unchanged, failed
+        or had to wait for tomorrow's budget"""
+        cache = self.client.transport.cache
+        outcomes = Counter()
+        if cache is not None and self.client.has_api_key():
+            candidates = cache.revalidation_candidates('details', self.batch_size,
+                                                       self.min_age, self.near_expiry)
+            affordable = list(itertools.takewhile(lambda _: self._take_budget(), candidates))
+            if len(affordable) < len(candidates):
+                outcomes['over_budget'] = len(candidates) - len(affordable)
+            candidates = affordable
+            outcomes.update(map_concurrently(self._revalidate, candidates, self.max_workers))
+            # map_concurrently reports calls that raised as None
+            outcomes['failed'] += outcomes.pop(None, 0)
+
+        with self._lock:
+            self.totals.update(outcomes)
+            self.last_run = time.time()
+        return dict(outcomes)
+
+    def stats(self):
+        with self._lock:
+            return {'last_run': self.last_run, **self.totals}
+
+    def _take_budget(self):
+        # Kept in the shared ledger under its own name, so every process draws on one budget
+        quota = self.client.transport.quota
+        if quota is not None:
+            return quota.try_consume(f"refresh:{self.client.api_key}", BACKGROUND, limit=self.daily_budget)
+        with self._lock:
+            today = time.strftime('%Y-%m-%d', time.gmtime())
+            if self._budget_day != today:
+                self._budget_day, self._budget_used = today, 0
+            if self._budget_used >= self.daily_budget:
+                return False
+            self._budget_used += 1
+            return True
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def _revalidate(self, candidate):
+        params, _, _, old_hash = candidate
+        try:
+            data = self.client.transport.get_json(dict(params, apikey=self.client.api_key),
+                                                  priority=BACKGROUND, revalidate=True)
+        except requests.exceptions.RequestException:
+            return 'failed'
+
+        # Error payloads aren't cached, so the old entry simply stays
+        if data.get('Response') != 'True':
+            return 'failed'
+        if content_hash(data) == old_hash:
+            return 'unchanged'
+        self.client.catalog.add(data)
+        return 'changed'
+
+
+_refreshers = {}
+_refreshers_lock = threading.Lock()
+
+
+def default_refresher(client, **kwargs):
+    """Started scheduler for client, one per client for the whole process"""
+    with _refreshers_lock:
+        if id(client) not in _refreshers:
+            _refreshers[id(client)] = RefreshScheduler(client, **kwargs).start()
+        return _refreshers[id(client)]
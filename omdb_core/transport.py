@@ -0,0 +1,214 @@
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from omdb_cache import cache_key, default_cache
+from omdb_concurrency import SingleFlight
+from omdb_metrics import SIZE_BUCKETS, default_metrics
+from omdb_quota import INTERACTIVE, QuotaExceeded, default_limiter, default_quota
+
+# Point this at a local stand-in server to keep tests and benchmarks offline
+DEFAULT_BASE_URL = os.getenv('OMDB_BASE_URL', "http://www.omdbapi.com/")
+
+
+def endpoint_name(params):
+    """Which OMDb lookup params make: search, details (by ID) or title"""
+    if 's' in params:
+        return 'search'
+    return 'details' if 'i' in params else 'title'
+
+
+def _error_message(response):
+    try:
+        return response.json().get('Error') or f"HTTP {response.status_code}"
+    except ValueError:
+        return f"HTTP {response.status_code}"
+
+
+class TransportPolicy:
+    """Everything OMDbTransport and AsyncOMDbTransport decide the same way: which key a
+    request goes out with, what the quota lets through, what a rejected key or a spent
+    quota means, what is cached and how failed attempts back off. Subclasses do the I/O.
+
+    Every method here is blocking (the cache and quota ledger are SQLite), so the async
+    transport calls them through asyncio.to_thread.
+    """
+
+    def __init__(self, base_url=None, cache=None, max_retries=3, backoff=0.5, quota=None,
+                 rate_limiter=None, key_pool=None, metrics=None):
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        # cache=False turns caching off entirely
+        if cache is None:
+            cache = default_cache()
+        self.cache = cache or None
+
+        # Daily quota ledger and rate limiter; False turns either off
+        self.quota = (default_quota() if quota is None else quota) or None
+        self.rate_limiter = (default_limiter() if rate_limiter is None else rate_limiter) or None
+
+        # When set, each request is sent with a key picked from the pool instead of params['apikey']
+        self.key_pool = key_pool
+
+        # Upstream latency, payload sizes and cache hit rate; False turns recording off
+        self.metrics = (default_metrics() if metrics is None else metrics) or None
+
+    def stats(self):
+        """Cache, request coalescing and per-key usage counters"""
+        stats = {'singleflight': self._flight_stats()}
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        if self.key_pool is not None:
+            stats['keys'] = self.key_pool.stats()
+        return stats
+
+    def _flight_stats(self):
+        raise NotImplementedError
+
+    def _cached(self, params):
+        # A fresh cached answer, or None
+        if self.cache is None:
+            return None
+        cached = self.cache.get(params)
+        if self.metrics is not None:
+            self.metrics.inc('omdb_cache_lookups_total', endpoint=endpoint_name(params),
+                             result='miss' if cached is None else 'hit')
+        return cached
+
+    def _next_attempt(self, params, priority, tried):
+        """Params for the next attempt, sent with a key the quota still lets through.
+
+        Returns (params, None) to send, or (None, stale) when every key is spent but an
+        old answer is cached. Raises QuotaExceeded when there is not even that.
+        """
+        while True:
+            if self.key_pool is not None:
+                params = dict(params, apikey=self.key_pool.acquire(exclude=tried))
+            api_key = params.get('apikey')
+            tried.append(api_key)
+
+            if self.quota is None or self.quota.try_consume(api_key, priority):
+                return params, None
+            if self._can_switch_key(tried):
+                continue
+
+            # Out of quota for today: an old answer beats no answer
+            stale = self.cache.get(params, allow_stale=True) if self.cache is not None else None
+            if stale is not None:
+                return None, stale
+            raise QuotaExceeded("Daily OMDb request quota reached")
+
+    def _can_switch_key(self, tried):
+        return self.key_pool is not None and len(tried) < len(self.key_pool)
+
+    def _rejected(self, params, status, message, tried):
+        """Whether a request that failed with an HTTP status should go out again with another key"""
+        # OMDb rejects bad and over-limit keys with 401: bench the key and try another
+        if self.key_pool is None or status not in (401, 403):
+            return False
+        self.key_pool.disable(params.get('apikey'), message)
+        return self._can_switch_key(tried)
+
+    def _keep(self, params, data):
+        # Only successful lookups are worth keeping
+        if self.cache is not None and data.get('Response') == 'True':
+            self.cache.set(params, data)
+        return data
+
+    def _backoff_delay(self, attempt):
+        # Jittered exponential backoff between retries of 5xx responses and connection problems
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _record(self, params, status, elapsed, size):
+        endpoint = endpoint_name(params)
+        self.metrics.inc('omdb_upstream_requests_total', endpoint=endpoint, status=status)
+        self.metrics.observe('omdb_upstream_seconds', elapsed, endpoint=endpoint)
+        self.metrics.observe('omdb_upstream_bytes', size, SIZE_BUCKETS, endpoint=endpoint)
+
+    def _record_error(self, params):
+        self.metrics.inc('omdb_upstream_requests_total', endpoint=endpoint_name(params), status='error')
+
+
+class OMDbTransport(TransportPolicy):
+    """Sends requests to OMDb over one pooled session and serves repeats from the response cache"""
+
+    def __init__(self, base_url=None, timeout=10, connect_timeout=3.05, cache=None,
+                 pool_size=10, max_retries=3, backoff=0.5, quota=None, rate_limiter=None,
+                 key_pool=None, metrics=None):
+        super().__init__(base_url, cache=cache, max_retries=max_retries, backoff=backoff, quota=quota,
+                         rate_limiter=rate_limiter, key_pool=key_pool, metrics=metrics)
+        self.timeout = (connect_timeout, timeout)
+
+        # Identical requests already in flight are shared rather than repeated
+        self.flights = SingleFlight()
+
+        # One keep-alive session shared by every call made through this transport
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_json(self, params, priority=INTERACTIVE, revalidate=False):
+        """Return the decoded OMDb response for params.
+
+        Background work should pass priority=BACKGROUND so it waits behind
+        interactive requests and leaves part of the daily quota for them.
+        revalidate=True skips the cache lookup and refetches (storing the result).
+        """
+        if not revalidate:
+            cached = self._cached(params)
+            if cached is not None:
+                return cached
+
+        return self.flights.do(cache_key(params), lambda: self._fetch(params, priority))
+
+    def close(self):
+        self.session.close()
+
+    def _flight_stats(self):
+        return self.flights.stats()
+
+    def _fetch(self, params, priority):
+        tried = []
+        while True:
+            send, stale = self._next_attempt(params, priority, tried)
+            if send is None:
+                return stale
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(priority)
+
+            try:
+                data = self._send(send).json()
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and self._rejected(send, e.response.status_code,
+                                                             _error_message(e.response), tried):
+                    continue
+                raise
+
+            return self._keep(send, data)
+
+    def _send(self, params):
+        attempt = 0
+        while True:
+            try:
+                start = time.perf_counter()
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                if self.metrics is not None:
+                    self._record(params, response.status_code, time.perf_counter() - start, len(response.content))
+                if response.status_code < 500 or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if self.metrics is not None:
+                    self._record_error(params)
+                if attempt >= self.max_retries:
+                    raise
+
+            time.sleep(self._backoff_delay(attempt))
+            attempt += 1
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from omdb_quota import BACKGROUND, INTERACTIVE, default_limiter, default_quota
+
+# state is one of 'unknown', 'valid', 'invalid' or 'error'; checked_at is a timestamp or None
+KeyStatus = namedtuple('KeyStatus', ['state', 'checked_at', 'message'])
+
+UNKNOWN = KeyStatus('unknown', None, None)
+
+# A well-known title, so a valid key always gets a successful lookup
+PROBE_IMDB_ID = 'tt0111161'
+
+
+class KeyValidator:
+    """Checks OMDb API keys in the background and remembers the outcome for a while.
+
+    A probe is a real OMDb request, so it waits for the shared rate limiter
+    and is counted in the daily quota ledger like any other.
+    """
+
+    def __init__(self, base_url=None, ttl=6 * 60 * 60, error_ttl=5 * 60, timeout=5, quota=None,
+                 rate_limiter=None):
+        # Imported here because omdb_core itself builds on this module
+        from omdb_core.transport import DEFAULT_BASE_URL
+
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.ttl = ttl
+        self.error_ttl = error_ttl  # retry sooner when the check itself failed
+        self.timeout = timeout
+        # Same defaults as the transport; False turns either off
+        self.quota = (default_quota() if quota is None else quota) or None
+        self.rate_limiter = (default_limiter() if rate_limiter is None else rate_limiter) or None
+
+        self._statuses = {}
+        self._checking = set()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
+    def status(self, api_key):
+        """Return the last known status without blocking, scheduling a check if it's missing or stale"""
+        with self._lock:
+            current = self._statuses.get(api_key, UNKNOWN)
+            if self._is_stale(current) and api_key not in self._checking:
+                self._checking.add(api_key)
+                self._executor.submit(self._check_in_background, api_key)
+        return current
+
+    def validate(self, api_key, priority=INTERACTIVE):
+        """Check a key right now and remember the result"""
+        result = self._probe(api_key, priority)
+        with self._lock:
+            self._statuses[api_key] = result
+        return result
+
+    def statuses(self):
+        """Every key seen so far with its last status, including when it was checked"""
+        with self._lock:
+            return dict(self._statuses)
+
+    def _is_stale(self, status):
+        if status.checked_at is None:
+            return True
+        ttl = self.error_ttl if status.state == 'error' else self.ttl
+        return time.time() - status.checked_at >= ttl
+
+    def _check_in_background(self, api_key):
+        try:
+            self.validate(api_key, BACKGROUND)
+        finally:
+            with self._lock:
+                self._checking.discard(api_key)
+
+    def _probe(self, api_key, priority):
+        # Skips the response cache, which ignores API keys, but not the limiter or the quota
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(priority)
+        if self.quota is not None and not self.quota.try_consume(api_key, priority):
+            return KeyStatus('error', time.time(), "Daily OMDb request quota reached")
+        params = {'apikey': api_key, 'i': PROBE_IMDB_ID}
+        try:
+            response = self._session.get(self.base_url, params=params, timeout=self.timeout)
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return KeyStatus('error', time.time(), str(e))
+
+        # OMDb answers bad or exhausted keys with 401; any other 200 means the key was accepted
+        if response.status_code in (401, 403):
+            return KeyStatus('invalid', time.time(), data.get('Error', f"HTTP {response.status_code}"))
+        if response.status_code == 200:
+            return KeyStatus('valid', time.time(), None)
+        return KeyStatus('error', time.time(), f"HTTP {response.status_code}")
+
+
+def parse_keys(value):
+    """Turn a key, a comma-separated string of keys or a list of keys into a list"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [key.strip() for key in value if key and key.strip()]
+
+
+def mask_key(api_key):
+    """Enough of a key to tell it apart in stats without leaking it"""
+    return f"{api_key[:3]}…{api_key[-2:]}" if len(api_key) > 6 else "…"
+
+
+class KeyPool:
+    """Spreads requests across several OMDb API keys, least-used first by weight.
+
+    A key that fails with an auth or limit error is benched for `cooldown`
+    seconds and then tried again. With a single key this never changes which
+    key is used.
+    """
+
+    def __init__(self, keys, weights=None, cooldown=60 * 60):
+        self.keys = parse_keys(keys)
+        if not self.keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.weights = dict(zip(self.keys, weights)) if weights else {key: 1 for key in self.keys}
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._requests = {key: 0 for key in self.keys}
+        self._failures = {key: 0 for key in self.keys}
+        self._disabled_until = {}
+        self._last_error = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def acquire(self, exclude=()):
+        """Pick the enabled key with the lowest weighted usage and count a request against it"""
+        now = time.time()
+        with self._lock:
+            candidates = [
+                key for key in self.keys
+                if key not in exclude and self._disabled_until.get(key, 0) <= now
+            ]
+            if not candidates:
+                # Everything is benched: use whichever key comes back soonest
+                remaining = [key for key in self.keys if key not in exclude] or self.keys
+                candidates = [min(remaining, key=lambda key: self._disabled_until.get(key, 0))]
+            key = min(candidates, key=lambda key: self._requests[key] / self.weights.get(key, 1))
+            self._requests[key] += 1
+            return key
+
+    def disable(self, api_key, reason, cooldown=None):
+        """Bench a key after an auth or limit error"""
+        with self._lock:
+            self._failures[api_key] = self._failures.get(api_key, 0) + 1
+            self._disabled_until[api_key] = time.time() + (self.cooldown if cooldown is None else cooldown)
+            self._last_error[api_key] = reason
+
+    def stats(self):
+        """Per-key usage, keyed by position in the pool; masks of short keys can collide"""
+        now = time.time()
+        with self._lock:
+            return {
+                index: {
+                    'key': mask_key(key),
+                    'requests': self._requests[key],
+                    'failures': self._failures[key],
+                    'enabled': self._disabled_until.get(key, 0) <= now,
+                    'last_error': self._last_error.get(key),
+                }
+                for index, key in enumerate(self.keys)
+            }
+
+
+_default_validator = None
+_default_validator_lock = threading.Lock()
+
+
+def default_validator():
+    """Process-wide validator shared by every page and session"""
+    global _default_validator
+    with _default_validator_lock:
+        if _default_validator is None:
+            _default_validator = KeyValidator()
+        return _default_validator
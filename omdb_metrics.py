@@ -0,0 +1,210 @@
+"""Latency and traffic metrics for the OMDb client.
+
+Collectors are plain counters and fixed-bucket histograms, so recording a
+value is a dictionary lookup and a bisect under a lock. A snapshot can be
+exported as Prometheus text or JSON, and served on a local port.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, each 1.5x the last, from 0.5 ms to about a minute
+LATENCY_BUCKETS = tuple(round(0.0005 * 1.5 ** i, 6) for i in range(30))
+
+# Upper bounds in bytes, powers of two from 256 B to 4 MB
+SIZE_BUCKETS = tuple(2 ** i for i in range(8, 23))
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum and maximum"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Estimate the q-th percentile (0-100) by interpolating within its bucket"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class Metrics:
+    """Registry of named counters and histograms, each split by keyword labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def counters(self):
+        """[(name, labels, value)] for every counter"""
+        with self._lock:
+            return [(name, dict(labels), value) for (name, labels), value in sorted(self._counters.items())]
+
+    def histograms(self, percentiles=(50, 95, 99)):
+        """Summary dicts (count, sum, max and the given percentiles) for every histogram"""
+        with self._lock:
+            summaries = []
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                summary = {'name': name, 'labels': dict(labels), 'count': histogram.count,
+                           'sum': histogram.sum, 'max': histogram.max}
+                for q in percentiles:
+                    summary[f'p{q}'] = histogram.percentile(q)
+                summaries.append(summary)
+            return summaries
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_json(self):
+        return json.dumps({
+            'counters': [{'name': name, 'labels': labels, 'value': value}
+                         for name, labels, value in self.counters()],
+            'histograms': self.histograms(),
+        })
+
+    def to_prometheus(self):
+        """Everything in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [(key, list(h.bounds), list(h.counts), h.count, h.sum)
+                          for key, h in sorted(self._histograms.items())]
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for (name, labels), bounds, counts, count, total in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(bounds) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class MetricsServer:
+    """Serves a Metrics registry over HTTP: /metrics as Prometheus text, /metrics.json as JSON"""
+
+    def __init__(self, metrics, port=9464, host='127.0.0.1'):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path == '/metrics':
+                    body, content_type = metrics.to_prometheus(), 'text/plain; version=0.0.4'
+                elif path == '/metrics.json':
+                    body, content_type = metrics.to_json(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name='omdb-metrics', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_default_metrics = None
+_default_server = None
+_default_lock = threading.Lock()
+
+
+def default_metrics():
+    """Process-wide registry that clients record into unless given their own"""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
+
+
+def default_metrics_server():
+    """Serve default_metrics() on OMDB_METRICS_PORT, once per process; None when the port isn't set"""
+    global _default_server
+    port = os.getenv('OMDB_METRICS_PORT')
+    if not port:
+        return None
+    metrics = default_metrics()
+    with _default_lock:
+        if _default_server is None:
+            try:
+                _default_server = MetricsServer(metrics, int(port)).start()
+            except OSError as e:
+                # Another process already owns the port
+                print(f"Could not serve metrics on port {port}: {e}")
+                return None
+        return _default_server
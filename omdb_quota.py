@@ -0,0 +1,159 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+# Request priorities: interactive calls are served before background ones
+INTERACTIVE = 0
+BACKGROUND = 1
+
+DEFAULT_DAILY_LIMIT = int(os.getenv('OMDB_DAILY_LIMIT', '1000'))
+DEFAULT_QUOTA_PATH = os.getenv('OMDB_QUOTA_PATH', '.omdb_quota.sqlite3')
+
+
+class QuotaExceeded(requests.exceptions.RequestException):
+    """Raised when a request would go over the daily quota and nothing cached can stand in"""
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter where interactive callers go first"""
+
+    def __init__(self, rate=10.0, burst=20):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._interactive_waiting = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self, priority=INTERACTIVE):
+        """Take a token if one is free, returning 0, or else how long to wait before trying again"""
+        with self._condition:
+            return self._try_take(priority)
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Block until a token is available; returns False if the timeout ran out first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if priority == INTERACTIVE:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    wait = self._try_take(priority, waiting=True)
+                    if wait == 0:
+                        return True
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                if priority == INTERACTIVE:
+                    self._interactive_waiting -= 1
+                    self._condition.notify_all()
+
+    def _try_take(self, priority, waiting=False):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        # Background work yields while any interactive caller is waiting
+        others_waiting = self._interactive_waiting - (1 if waiting and priority == INTERACTIVE else 0)
+        if priority != INTERACTIVE and others_waiting > 0:
+            return 1 / self.rate
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+
+class QuotaLedger:
+    """Daily request counts per API key, kept in SQLite so every thread and process shares them"""
+
+    def __init__(self, path=DEFAULT_QUOTA_PATH, daily_limit=DEFAULT_DAILY_LIMIT, background_share=0.8):
+        self.path = path
+        self.daily_limit = daily_limit
+        # Background work may only use this fraction, leaving the rest for users
+        self.background_share = background_share
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS usage ('
+            'day TEXT, key_id TEXT, count INTEGER, PRIMARY KEY (day, key_id))'
+        )
+
+    def try_consume(self, api_key, priority=INTERACTIVE, limit=None):
+        """Count one request against today's quota, or return False if it would go over.
+        `limit` replaces the daily limit, e.g. for a job's own budget kept under its own name."""
+        if limit is None:
+            limit = self.daily_limit
+            if priority != INTERACTIVE:
+                limit = int(limit * self.background_share)
+
+        day, key_id = self._today(), self._key_id(api_key)
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so processes can't both spend the last unit
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._db.execute(
+                    'SELECT count FROM usage WHERE day = ? AND key_id = ?', (day, key_id)
+                ).fetchone()
+                used = row[0] if row else 0
+                if used >= limit:
+                    self._db.execute('COMMIT')
+                    return False
+                self._db.execute(
+                    'INSERT INTO usage (day, key_id, count) VALUES (?, ?, 1) '
+                    'ON CONFLICT (day, key_id) DO UPDATE SET count = count + 1',
+                    (day, key_id)
+                )
+                self._db.execute('COMMIT')
+                return True
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def used(self, api_key):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT count FROM usage WHERE day = ? AND key_id = ?', (self._today(), self._key_id(api_key))
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self, api_key):
+        return max(0, self.daily_limit - self.used(api_key))
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+    @staticmethod
+    def _key_id(api_key):
+        # Keys themselves never touch the disk
+        return hashlib.sha256(str(api_key).encode()).hexdigest()[:16]
+
+
+_defaults = {}
+_defaults_lock = threading.Lock()
+
+
+def default_limiter():
+    """Process-wide rate limiter shared by every client"""
+    with _defaults_lock:
+        if 'limiter' not in _defaults:
+            _defaults['limiter'] = TokenBucket()
+        return _defaults['limiter']
+
+
+def default_quota():
+    """Process-wide handle on the shared quota ledger"""
+    with _defaults_lock:
+        if 'quota' not in _defaults:
+            _defaults['quota'] = QuotaLedger()
+        return _defaults['quota']
@@ -1,5 +1,14 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-import requests
+
+from diagnostics import show_diagnostics
+from omdb_concurrency import Prefetcher
+from omdb_core import Movie, default_client, default_refresher
+from omdb_keys import default_validator, mask_key
+from omdb_metrics import default_metrics_server
+from movie_grid import paginated_grid, recommendation_card, reset_page, search_card
 
 # Set your API key directly here (replace with your actual key)
 DEFAULT_API_KEY = "a966a1c4"
@@ -16,104 +25,6 @@ if 'selected_movie_id' not in st.session_state:
 if 'selected_movie_title' not in st.session_state:
     st.session_state.selected_movie_title = None
 
-
-class OMDbClient:
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.base_url = "http://www.omdbapi.com/"
-
-    def search_movies(self, title, year=None, movie_type=None):
-        """Search for movies by title"""
-        if not self.api_key or self.api_key == "your_actual_api_key_here":
-            st.error("❌ Please enter a valid API key in the sidebar!")
-            return []
-
-        params = {
-            'apikey': self.api_key,
-            's': title,
-            'type': movie_type or 'movie'
-        }
-
-        if year:
-            params['y'] = year
-
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('Response') == 'True':
-                return data['Search']
-            else:
-                error_msg = data.get('Error', 'Unknown error')
-                st.error(f"API Error: {error_msg}")
-                return []
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error fetching data: {e}")
-            return []
-
-    def get_movie_details(self, imdb_id):
-        """Get detailed information about a specific movie"""
-        if not self.api_key or self.api_key == "your_actual_api_key_here":
-            return None
-
-        params = {
-            'apikey': self.api_key,
-            'i': imdb_id,
-            'plot': 'full'
-        }
-
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('Response') == 'True':
-                return data
-            else:
-                return None
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error fetching movie details: {e}")
-            return None
-
-    def get_recommendations(self, favorite_movie_title, max_results=10):
-        """Get movie recommendations based on a favorite movie"""
-        if not self.api_key or self.api_key == "your_actual_api_key_here":
-            return []
-
-        # Search for the favorite movie
-        search_results = self.search_movies(favorite_movie_title)
-
-        if not search_results:
-            return []
-
-        # Get details of the first result
-        favorite_movie = self.get_movie_details(search_results[0]['imdbID'])
-
-        if not favorite_movie:
-            return []
-
-        # Search for similar movies based on genre
-        genre = favorite_movie.get('Genre', '').split(',')[0] if favorite_movie.get('Genre') else ''
-
-        if genre:
-            # Search by genre
-            similar_movies = self.search_movies(genre)
-
-            # Filter out the original movie and limit results
-            recommendations = []
-            for movie in similar_movies:
-                if movie['imdbID'] != favorite_movie['imdbID'] and len(recommendations) < max_results:
-                    # Get detailed information for each recommendation
-                    movie_details = self.get_movie_details(movie['imdbID'])
-                    if movie_details:
-                        recommendations.append(movie_details)
-
-            return recommendations
-
-        return []
-
-
 # Configure the page
 st.set_page_config(
     page_title="Movie Recommendation App",
@@ -140,24 +51,52 @@ if api_key != st.session_state.api_key:
 # Initialize OMDB client with the API key
 @st.cache_resource
 def get_omdb_client(api_key):
-    return OMDbClient(api_key)
+    # The core keeps one client per key for the whole process, so every page shares it
+    client = default_client(api_key, on_error=st.error)
+    # Cached details are revalidated in the background, most-read and soon-to-expire first
+    default_refresher(client)
+    # Metrics are exported on OMDB_METRICS_PORT when it is set
+    default_metrics_server()
+    return client
+
 
 client = get_omdb_client(st.session_state.api_key)
 
+# Hidden diagnostics view: open any page with ?diagnostics=1
+if st.query_params.get('diagnostics'):
+    show_diagnostics(client)
+    st.stop()
+
+
+@st.cache_resource
+def get_prefetch_pool():
+    # Shared by every session; two workers keep speculative traffic small
+    return ThreadPoolExecutor(max_workers=2)
+
+
+# Each session gets its own batch, so one user's new search doesn't cancel another's prefetch
+if 'prefetcher' not in st.session_state or st.session_state.prefetcher.fetch != client.prefetch_details:
+    st.session_state.prefetcher = Prefetcher(client.prefetch_details, executor=get_prefetch_pool())
+prefetcher = st.session_state.prefetcher
+
 # API Status
 st.sidebar.markdown("### 📊 API Status")
-if client.api_key and client.api_key != "your_actual_api_key_here":
+if client.has_api_key():
     st.sidebar.success("✅ API Key Loaded")
-    # Test the API key
-    test_params = {'apikey': client.api_key, 's': 'test', 'type': 'movie'}
-    try:
-        response = requests.get("http://www.omdbapi.com/", params=test_params)
-        if response.status_code == 200:
-            st.sidebar.success("✅ API Key is valid!")
+    # Every key in the pool is checked once in the background and the result cached, not probed on every rerun
+    for api_key in client.api_keys:
+        key_status = default_validator().status(api_key)
+        name = f"API key {mask_key(api_key)}" if len(client.api_keys) > 1 else "API key"
+        if key_status.state == 'valid':
+            st.sidebar.success(f"✅ {name} is valid!")
+        elif key_status.state == 'invalid':
+            st.sidebar.error(f"❌ {name} test failed")
+        elif key_status.state == 'error':
+            st.sidebar.warning(f"⚠️ Could not test {name}")
         else:
-            st.sidebar.error("❌ API Key test failed")
-    except:
-        st.sidebar.warning("⚠️ Could not test API key")
+            st.sidebar.info(f"⏳ Checking {name}...")
+        if key_status.checked_at:
+            st.sidebar.caption(f"Last checked at {time.strftime('%H:%M:%S', time.localtime(key_status.checked_at))}")
 else:
     st.sidebar.error("❌ Please enter a valid API key")
 
@@ -174,7 +113,7 @@ app_mode = st.sidebar.selectbox(
 )
 
 # Show main content only if API key is available
-if client.api_key and client.api_key != "your_actual_api_key_here":
+if client.has_api_key():
     if app_mode == "Movie Search":
         st.header("🔍 Search for Movies")
 
@@ -187,47 +126,47 @@ if client.api_key and client.api_key != "your_actual_api_key_here":
             search_year = st.text_input("Year (optional):", placeholder="e.g., 2010", key="year_input_main")
 
         # Search button
-        if st.button("Search Movies", key="search_btn_main") and search_query:
-            with st.spinner("Searching for movies..."):
-                movies = client.search_movies(search_query, search_year)
-                if movies:
-                    st.session_state.movies = movies
-                    st.success(f"Found {len(movies)} movies!")
-                else:
-                    st.session_state.movies = []
-                    st.error("No movies found. Please try a different search term.")
+        searching = st.button("Search Movies", key="search_btn_main") and bool(search_query)
+        status = st.empty()
+
+        # A new query makes the previous results' prefetch pointless
+        if searching or search_query != st.session_state.get('prefetch_query'):
+            prefetcher.start()
+            st.session_state.prefetch_query = search_query if searching else None
 
         # Display movies
-        if st.session_state.movies:
+        if searching or st.session_state.movies:
             st.markdown("---")
             st.subheader("🎬 Search Results")
 
-            # Display movies in a grid
-            cols = st.columns(3)
-            for i, movie in enumerate(st.session_state.movies):
-                with cols[i % 3]:
-                    with st.container():
-                        # Movie card
-                        st.write(f"### {movie['Title']}")
-
-                        # Poster
-                        if movie.get('Poster') and movie['Poster'] != 'N/A':
-                            st.image(movie['Poster'], use_column_width=True)
-                        else:
-                            st.info("🎭 No poster available")
-
-                        st.write(f"**Year:** {movie.get('Year', 'N/A')}")
-                        st.write(f"**Type:** {movie.get('Type', 'N/A').title()}")
-
-                        # Button to view details in new page - FIXED
-                        if st.button(f"View Full Details", key=f"view_details_{i}"):
-                            # Store the selected movie in session state
-                            st.session_state.selected_movie_id = movie['imdbID']
-                            st.session_state.selected_movie_title = movie['Title']
-                            # Switch to details page - CHANGED TO page_link
-                            st.page_link("pages/2_Movie_Details.py", label="Go to Movie Details", icon="🎬")
-
-                        st.markdown("---")
+            if searching:
+                # Show the first page as results stream in, then hand over to the paged grid
+                status.info("Searching for movies...")
+                st.session_state.movies = []
+                reset_page('search')
+                preview = st.empty()
+                with preview.container():
+                    cols = st.columns(3)
+                    for hit in client.iter_search(search_query, search_year):
+                        movie = Movie.from_omdb(hit, client.catalog)
+                        i = len(st.session_state.movies)
+                        st.session_state.movies.append(movie)
+                        # Fetch full details in the background so opening them is instant
+                        prefetcher.add(movie.imdb_id)
+                        if i < 12:
+                            with cols[i % 3]:
+                                # Posters left loading here are finished by the grid below
+                                search_card(movie, f"preview_{i}", [])
+                preview.empty()
+
+            # Only the visible page is rendered; paging reruns just the grid
+            paginated_grid(st.session_state.movies, search_card, 'search', columns=3, page_size=12)
+
+        if searching:
+            if st.session_state.movies:
+                status.success(f"Found {len(st.session_state.movies)} movies!")
+            else:
+                status.error("No movies found. Please try a different search term.")
 
     elif app_mode == "Get Recommendations":
         st.header("🎯 Get Movie Recommendations")
@@ -255,7 +194,10 @@ if client.api_key and client.api_key != "your_actual_api_key_here":
             with st.spinner("Finding recommendations..."):
                 recommendations = client.get_recommendations(favorite_movie, num_recommendations)
                 if recommendations:
-                    st.session_state.recommendations = recommendations
+                    # Sessions keep compact records; heavy fields stay in the shared catalog
+                    st.session_state.recommendations = [Movie.from_omdb(movie, client.catalog)
+                                                        for movie in recommendations]
+                    reset_page('recs')
                     st.success(f"Found {len(recommendations)} recommendations!")
                 else:
                     st.session_state.recommendations = []
@@ -267,42 +209,8 @@ if client.api_key and client.api_key != "your_actual_api_key_here":
             st.subheader("🎭 Recommended Movies")
 
             # Display recommendations in a grid
-            cols = st.columns(2)
-            for i, movie in enumerate(st.session_state.recommendations):
-                with cols[i % 2]:
-                    with st.container():
-                        st.write(f"### {movie['Title']}")
-
-                        # Movie poster and info in columns
-                        col_img, col_info = st.columns([1, 2])
-
-                        with col_img:
-                            if movie.get('Poster') and movie['Poster'] != 'N/A':
-                                st.image(movie['Poster'], use_column_width=True)
-                            else:
-                                st.info("📸 No poster")
-
-                        with col_info:
-                            st.write(f"**📅 Year:** {movie.get('Year', 'N/A')}")
-                            st.write(f"**🎭 Genre:** {movie.get('Genre', 'N/A')}")
-                            st.write(f"**🎬 Director:** {movie.get('Director', 'N/A')}")
-                            st.write(f"**⭐ IMDB Rating:** {movie.get('imdbRating', 'N/A')}/10")
-                            st.write(f"**⏱️ Runtime:** {movie.get('Runtime', 'N/A')}")
-
-                        # Button to view details in new page - FIXED
-                        if st.button(f"View Full Details", key=f"rec_view_{i}"):
-                            # Store the selected movie in session state
-                            st.session_state.selected_movie_id = movie['imdbID']
-                            st.session_state.selected_movie_title = movie['Title']
-                            # Switch to details page - CHANGED TO page_link
-                            st.page_link("pages/2_Movie_Details.py", label="Go to Movie Details", icon="🎬")
-
-                        # Plot summary in expander
-                        if movie.get('Plot') and movie['Plot'] != 'N/A':
-                            with st.expander("📖 Quick Plot Summary"):
-                                st.write(movie['Plot'])
-
-                        st.markdown("---")
+            paginated_grid(st.session_state.recommendations, recommendation_card, 'recs',
+                           columns=2, page_size=10)
 
     else:
         st.header("About This App")
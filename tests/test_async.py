@@ -0,0 +1,70 @@
+import asyncio
+
+from mock_omdb_server import MockOMDbServer, build_catalog
+from movie_catalog import MovieCatalog
+from omdb_async import AsyncOMDbClient
+from omdb_core import PLACEHOLDER_API_KEY
+
+
+def test_details_in_order_fetches_only_what_it_needs():
+    ids = [movie['imdbID'] for movie in build_catalog(40)]
+
+    async def fetch(base_url):
+        client = AsyncOMDbClient('key', cache=False, quota=False, rate_limiter=False,
+                                 base_url=base_url, catalog=MovieCatalog())
+        try:
+            return await client._details_in_order(ids, 3)
+        finally:
+            await client.aclose()
+
+    with MockOMDbServer(latency=0.01, catalog_size=40) as server:
+        movies = asyncio.run(fetch(server.base_url))
+
+    assert [movie['imdbID'] for movie in movies] == ids[:3]
+    assert server.request_count == 3
+
+
+def test_abandoned_request_is_cancelled_upstream():
+    async def abandon(base_url):
+        client = AsyncOMDbClient('key', cache=False, quota=False, rate_limiter=False,
+                                 base_url=base_url, catalog=MovieCatalog())
+        try:
+            first = asyncio.ensure_future(client.get_movie_details('tt0000001'))
+            second = asyncio.ensure_future(client.get_movie_details('tt0000001'))
+            await asyncio.sleep(0.05)
+            # One waiter leaving keeps the shared request alive for the other
+            first.cancel()
+            assert (await second)['imdbID'] == 'tt0000001'
+
+            third = asyncio.ensure_future(client.get_movie_details('tt0000002'))
+            await asyncio.sleep(0.05)
+            third.cancel()
+            await asyncio.sleep(0)
+            return client.transport._in_flight
+        finally:
+            await client.aclose()
+
+    with MockOMDbServer(latency=0.2, catalog_size=5) as server:
+        assert asyncio.run(abandon(server.base_url)) == {}
+
+
+def test_async_client_follows_the_shared_client_policy():
+    reports = []
+
+    async def search(base_url, api_key):
+        client = AsyncOMDbClient(api_key, cache=False, quota=False, rate_limiter=False, base_url=base_url,
+                                 catalog=MovieCatalog(), on_error=reports.append)
+        try:
+            return [await client.search_movies('night'), await client.search_movies('Night ')]
+        finally:
+            await client.aclose()
+
+    with MockOMDbServer(catalog_size=200) as server:
+        first, repeat = asyncio.run(search(server.base_url, 'key'))
+        # The repeat is answered from the result memo
+        assert first and repeat == first
+        assert server.request_count == 1
+
+        assert asyncio.run(search(server.base_url, PLACEHOLDER_API_KEY)) == [[], []]
+        assert server.request_count == 1
+        assert reports == ["❌ Please enter a valid API key in the sidebar!"] * 2
@@ -0,0 +1,79 @@
+import time
+
+from omdb_cache import ResponseCache
+
+SEARCH = {'apikey': 'key', 's': 'alien'}
+DETAILS = {'apikey': 'key', 'i': 'tt0078748'}
+
+
+def test_responses_expire_per_endpoint(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = ResponseCache(path, ttls={'search': 0})
+    cache.set(SEARCH, {'Response': 'True', 'Search': []})
+    cache.set(DETAILS, {'Response': 'True', 'Title': 'Alien'})
+
+    assert cache.get(SEARCH) is None
+    assert cache.get(SEARCH, allow_stale=True) == {'Response': 'True', 'Search': []}
+    # The API key isn't part of the key
+    assert cache.get(dict(DETAILS, apikey='other'))['Title'] == 'Alien'
+
+    # The disk tier applies the same expiry once the memory tier is gone
+    reopened = ResponseCache(path, ttls={'search': 0})
+    assert reopened.get(SEARCH) is None
+    assert reopened.get(DETAILS)['Title'] == 'Alien'
+    assert reopened.stats()['disk_hits'] == 1
+
+
+def test_both_tiers_evict_least_recently_used(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = ResponseCache(path, memory_entries=2, disk_entries=3)
+    for n in range(3):
+        cache.set({'i': f'tt{n}'}, {'n': n})
+        time.sleep(0.01)
+    assert cache.stats()['memory_entries'] == 2
+
+    # Reading tt0 back from disk makes tt1 the least recently used
+    assert cache.get({'i': 'tt0'}) == {'n': 0}
+    time.sleep(0.01)
+    cache.set({'i': 'tt3'}, {'n': 3})
+    assert cache.stats()['disk_entries'] == 3
+
+    reopened = ResponseCache(path)
+    assert reopened.get({'i': 'tt1'}) is None
+    assert [reopened.get({'i': f'tt{n}'}) for n in (0, 2, 3)] == [{'n': 0}, {'n': 2}, {'n': 3}]
+
+
+class FakeClock:
+    """Stands in for the time module inside omdb_cache"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def test_revalidation_prefers_expiring_then_most_read(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr('omdb_cache.time', clock)
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttls={'details': 100})
+
+    def stored(imdb_id, at, reads):
+        clock.now = at
+        cache.set({'i': imdb_id}, {'imdbID': imdb_id})
+        return imdb_id, reads
+
+    entries = [stored('older', -10, 0), stored('old', 0, 1), stored('hot', 50, 3), stored('warm', 50, 1),
+               stored('cold', 50, 0), stored('new', 99, 5)]
+    clock.now = 99.5
+    for imdb_id, reads in entries:
+        for _ in range(reads):
+            assert cache.get({'i': imdb_id})
+
+    # Expiring within 20s first (most read first), then read entries, most read first.
+    # Unread entries with time left and anything under 5s old are skipped.
+    clock.now = 100
+    candidates = cache.revalidation_candidates('details', 10, min_age=5, near_expiry=20)
+    assert [params['i'] for params, _, _, _ in candidates] == ['old', 'older', 'hot', 'warm']
+    assert [hits for _, _, hits, _ in candidates] == [1, 0, 3, 1]
+    assert len(cache.revalidation_candidates('details', 2, min_age=5, near_expiry=20)) == 2
@@ -0,0 +1,35 @@
+from movie_catalog import MovieCatalog
+
+
+def test_find_title_needs_the_whole_title():
+    catalog = MovieCatalog()
+    catalog.add({'Title': 'The Dark Knight Rises', 'imdbID': 'tt1345836', 'Response': 'True'})
+
+    assert catalog.find_title('The Dark Knight') is None
+    assert catalog.find_title('Knight') is None
+    assert catalog.find_title('the dark knight rises')['imdbID'] == 'tt1345836'
+
+
+def test_store_backed_search_matches_in_memory(tmp_path):
+    from mock_omdb_server import build_catalog
+    from movie_store import ColumnarStore
+
+    movies = build_catalog(2000)
+    store = ColumnarStore(str(tmp_path))
+    store.append(movies[:1000])
+    store.append(movies[1000:])
+    backed, in_memory = MovieCatalog(store=store), MovieCatalog()
+    in_memory.add_many(movies)
+    # A runtime copy wins over the store's row
+    renamed = dict(movies[0], Title=movies[0]['Title'] + ' Redux')
+    backed.add(renamed)
+    in_memory.add(renamed)
+
+    for movie in movies[:50]:
+        title = movie['Title']
+        assert backed.search(title, limit=3) == in_memory.search(title, limit=3)
+        assert backed.search(title, year=movie['Year']) == in_memory.search(title, year=movie['Year'])
+        # A typo falls back to trigram similarity
+        assert backed.search(title[:-1] + 'q') == in_memory.search(title[:-1] + 'q')
+        assert backed.find_title(title) == in_memory.find_title(title)
+    assert movies[0]['imdbID'] in backed and 'tt9999999x' not in backed
@@ -0,0 +1,90 @@
+import threading
+from collections import Counter
+
+import requests
+
+from mock_omdb_server import build_catalog
+from movie_catalog import MovieCatalog
+from omdb_cache import ResultMemo, memo_key
+from omdb_core.client import OMDbClient
+
+
+class FailingTransport:
+    base_url = 'http://omdb.invalid/'
+
+    def get_json(self, params, priority=None):
+        if 's' in params:
+            return {'Response': 'True', 'Search': [{'imdbID': f'tt{i:07d}', 'Title': str(i)} for i in range(10)]}
+        raise requests.exceptions.ConnectionError("connection refused")
+
+
+def test_errors_from_pool_threads_are_reported_by_the_caller():
+    reports = []
+    client = OMDbClient('key', transport=FailingTransport(), catalog=MovieCatalog(), memo=False, metrics=False,
+                        on_error=lambda message: reports.append((message, threading.current_thread())))
+    favorite = {'imdbID': 'tt9999999', 'Title': 'Favorite', 'Genre': 'Drama'}
+
+    assert client._genre_recommendations(favorite, 5, concurrent=True) == []
+    assert reports == [("Error fetching movie details: connection refused", threading.current_thread())]
+
+
+def test_background_refresh_errors_stay_off_the_page(capsys):
+    reports = []
+    memo = ResultMemo(ttl=0, stale_ttl=60)
+    client = OMDbClient('key', transport=FailingTransport(), catalog=MovieCatalog(), memo=memo, metrics=False,
+                        on_error=reports.append)
+    memo.put(memo_key('details', 'tt0000001', 'full'), {'imdbID': 'tt0000001'})
+
+    # The stale copy is served and refreshed on a memo thread, where the failure is only logged
+    assert client._memoized(memo_key('details', 'tt0000001', 'full'),
+                            lambda: client.get_movie_details('tt0000001')) == {'imdbID': 'tt0000001'}
+    memo._executor.shutdown(wait=True)
+    assert reports == []
+    assert "connection refused" in capsys.readouterr().out
+
+
+class CountingTransport:
+    """Serves mock catalog movies and counts each distinct request"""
+    base_url = 'http://omdb.invalid/'
+
+    def __init__(self, movies):
+        self.movies = movies
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+    def get_json(self, params, priority=None):
+        key = next((name, params[name]) for name in ('i', 't', 's') if name in params)
+        with self._lock:
+            self.requests[key] += 1
+        if 's' in params:
+            hits = [movie for movie in self.movies if movie['Genre'].startswith(params['s'])][:10]
+            return {'Response': 'True', 'Search': hits, 'totalResults': str(len(hits))}
+        name, value = key
+        field = 'imdbID' if name == 'i' else 'Title'
+        return next((dict(movie) for movie in self.movies if movie[field] == value),
+                    {'Response': 'False', 'Error': 'Movie not found!'})
+
+
+def test_recommendations_batch_fetches_each_movie_once():
+    movies = build_catalog(80)
+    titles = [title for title, count in Counter(movie['Title'] for movie in movies).items() if count == 1][:2]
+    transport = CountingTransport(movies)
+    client = OMDbClient('key', transport=transport, catalog=MovieCatalog(), memo=False, metrics=False)
+
+    # A repeated seed is looked up once and keyed once
+    per_seed = client.get_recommendations_batch([titles[0], titles[1], titles[0]], max_results=5)
+    assert list(per_seed) == titles
+    for title, ranked in per_seed.items():
+        assert 0 < len(ranked) <= 5
+        assert title not in {movie['Title'] for movie in ranked}
+    assert [transport.requests[('t', title)] for title in titles] == [1, 1]
+    # Warming the catalog fetches each candidate's details at most once for the whole batch
+    details = [count for (name, _), count in transport.requests.items() if name == 'i']
+    assert details and max(details) == 1
+
+    # Combined ranks one list for the set; seeds and candidates now come from the catalog
+    fetched = sum(transport.requests.values())
+    combined = client.get_recommendations_batch(titles, max_results=5, combined=True)
+    assert 0 < len(combined) <= 5
+    assert not {movie['Title'] for movie in combined} & set(titles)
+    assert sum(transport.requests.values()) == fetched
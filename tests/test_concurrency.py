@@ -0,0 +1,38 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from omdb_concurrency import SingleFlight
+
+
+def test_concurrent_calls_for_one_key_share_a_single_run():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        release.wait(5)
+        return 'done'
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, 'key', slow) for _ in range(5)]
+        deadline = time.monotonic() + 5
+        while flight.stats()['coalesced'] < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        assert [future.result() for future in futures] == ['done'] * 5
+
+    assert runs == [1]
+    assert flight.stats() == {'leaders': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_finished_calls_are_not_shared():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: int('not a number'))
+    # A failure isn't remembered: the next call runs again
+    assert flight.do('key', lambda: 42) == 42
+    assert flight.stats() == {'leaders': 2, 'coalesced': 0, 'in_flight': 0}
@@ -0,0 +1,37 @@
+from mock_omdb_server import MockOMDbServer
+from omdb_keys import KeyPool, KeyValidator
+from omdb_quota import QuotaLedger
+
+
+def test_key_probes_are_counted_in_the_quota(tmp_path):
+    quota = QuotaLedger(str(tmp_path / 'quota.sqlite3'), daily_limit=1)
+    with MockOMDbServer() as server:
+        validator = KeyValidator(server.base_url, quota=quota, rate_limiter=False)
+        assert validator.validate('first').state == 'valid'
+        # The one request today's quota allows is spent, so the second check never goes out
+        assert validator.validate('first').state == 'error'
+        assert validator.validate('second').state == 'valid'
+    assert server.request_count == 2
+    assert quota.used('first') == 1
+
+
+def test_pool_spreads_requests_by_weight():
+    pool = KeyPool('a, b', weights=[3, 1])
+    assert [pool.acquire() for _ in range(4)] == ['a', 'b', 'a', 'a']
+    assert pool.acquire(exclude=['a']) == 'b'
+
+
+def test_disabled_key_sits_out_its_cooldown():
+    pool = KeyPool(['a', 'b'], cooldown=60)
+    pool.disable('a', 'Request limit reached!')
+    assert [pool.acquire() for _ in range(2)] == ['b', 'b']
+    assert pool.stats()[0] == {'key': '…', 'requests': 0, 'failures': 1, 'enabled': False,
+                               'last_error': 'Request limit reached!'}
+
+    # With every key benched, the one back soonest is used
+    pool.disable('b', 'Invalid API key!', cooldown=30)
+    assert pool.acquire() == 'b'
+    # Once its cooldown is over a key is picked again
+    pool.disable('a', 'Request limit reached!', cooldown=0)
+    assert pool.acquire() == 'a'
+    assert pool.stats()[0]['failures'] == 2
@@ -0,0 +1,35 @@
+import pytest
+
+from mock_omdb_server import MockOMDbServer
+from omdb_cache import ResponseCache
+from omdb_core.transport import OMDbTransport
+from omdb_quota import BACKGROUND, QuotaExceeded, QuotaLedger
+
+
+def test_background_work_only_gets_its_share(tmp_path):
+    path = str(tmp_path / 'quota.sqlite3')
+    quota = QuotaLedger(path, daily_limit=4, background_share=0.5)
+
+    assert [quota.try_consume('key', BACKGROUND) for _ in range(3)] == [True, True, False]
+    # Interactive requests can still use what background work had to leave
+    assert [quota.try_consume('key') for _ in range(3)] == [True, True, False]
+    assert quota.used('key') == 4 and quota.remaining('key') == 0
+    assert quota.try_consume('key', limit=10)
+
+    # Counts are per key, and shared with other ledgers (processes) on the same file
+    assert quota.try_consume('other')
+    assert QuotaLedger(path, daily_limit=4).used('key') == 5
+
+
+def test_spent_quota_falls_back_to_a_stale_answer(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttls={'details': 0})
+    quota = QuotaLedger(str(tmp_path / 'quota.sqlite3'), daily_limit=1)
+    with MockOMDbServer() as server:
+        transport = OMDbTransport(server.base_url, cache=cache, quota=quota, rate_limiter=False, metrics=False)
+        fresh = transport.get_json({'apikey': 'key', 'i': 'tt0000001'})
+
+        # Expired, but an old answer beats none once the quota is spent
+        assert transport.get_json({'apikey': 'key', 'i': 'tt0000001'}) == fresh
+        with pytest.raises(QuotaExceeded):
+            transport.get_json({'apikey': 'key', 'i': 'tt0000002'})
+    assert server.request_count == 1
@@ -0,0 +1,63 @@
+import os
+
+from mock_omdb_server import build_catalog
+from movie_catalog import MovieCatalog
+from movie_similarity import SimilarityEngine, shared_engine
+
+
+def test_similar_after_incremental_growth():
+    movies = build_catalog(51)
+    catalog = MovieCatalog()
+    for movie in movies[:50]:
+        catalog.add(movie)
+    engine = SimilarityEngine(catalog)
+    assert len(engine.similar(movies[0], 5)) == 5
+
+    # A small addition is encoded incrementally instead of refitting
+    catalog.add(movies[50])
+    assert len(engine.similar(movies[50], 5)) == 5
+    assert engine.ids[-1] == movies[50]['imdbID']
+    assert len(engine.matrix) == 51
+
+
+def test_saved_index_is_reopened_and_caught_up(tmp_path):
+    movies = build_catalog(61)
+    catalog = MovieCatalog()
+    catalog.add_many(movies[:60])
+    engine = SimilarityEngine(catalog, ann_threshold=40, ann_path=str(tmp_path))
+    expected = engine.similar(movies[0], 5)
+    # Above the threshold only the index holds vectors
+    assert engine.ann is not None and len(engine.matrix) == 0
+
+    # A new process reopens the index instead of refitting, and encodes only what it lacks
+    catalog = MovieCatalog()
+    catalog.add_many(movies)
+    reopened = SimilarityEngine(catalog, ann_threshold=40, ann_path=str(tmp_path))
+    assert reopened.similar(movies[0], 5) == expected
+    assert reopened._fitted_size == 60
+    assert len(reopened.ann) == 61
+    assert movies[60]['imdbID'] in reopened.ids
+    # Catching up never writes to the shared files
+    saved = reopened._current_ann()
+    with open(os.path.join(saved, 'ids.json')) as f:
+        assert movies[60]['imdbID'] not in f.read()
+
+    # A rebuild lands in a fresh directory; an existing reader keeps its mapped view
+    catalog.add_many(build_catalog(90)[61:])
+    rebuilt = SimilarityEngine(catalog, ann_threshold=40, ann_path=str(tmp_path))
+    rebuilt.refresh()
+    assert rebuilt._current_ann() != saved and not os.path.exists(saved)
+    assert reopened.ann.search_batch(reopened.vectorize(movies[:1]), 5)
+
+
+def test_clients_over_one_catalog_share_an_engine():
+    from omdb_core import OMDbClient
+
+    def client(catalog):
+        return OMDbClient('key', catalog=catalog, cache=False, quota=False, rate_limiter=False,
+                          memo=False, metrics=False)
+
+    catalog = MovieCatalog()
+    first, second = client(catalog), client(catalog)
+    assert first.recommender is second.recommender is shared_engine(catalog)
+    assert client(MovieCatalog()).recommender is not first.recommender